@@ -0,0 +1,197 @@
+"""
+Adaptive Selection Module
+Chooses passages that exercise a typist's slow or error-prone keys.
+
+Each passage is described by the density of its characters and character
+pairs. The densities are stored as an inverted index (feature -> passage
+postings), so scoring a weakness profile against the corpus is a sparse
+dot product over only the postings of the weak features.
+"""
+
+import random
+from array import array
+from bisect import bisect_left
+from collections import Counter
+
+from key_latency import KEY_SLOTS, key_slot
+
+
+def char_feature(char):
+    """Feature id for a single character"""
+    return key_slot(char)
+
+
+def bigram_feature(first, second):
+    """Feature id for a character pair"""
+    return KEY_SLOTS + key_slot(first) * KEY_SLOTS + key_slot(second)
+
+
+def passage_features(text):
+    """
+    Character and pair densities of a passage
+
+    Returns:
+        dict: Feature id -> occurrences per character of text
+    """
+    if not text:
+        return {}
+    # Count distinct characters and pairs first, then map them to features
+    features = {}
+    for char, count in Counter(text).items():
+        feature = char_feature(char)
+        features[feature] = features.get(feature, 0) + count
+    for (first, second), count in Counter(zip(text, text[1:])).items():
+        feature = bigram_feature(first, second)
+        features[feature] = features.get(feature, 0) + count
+    length = len(text)
+    return {feature: count / length for feature, count in features.items()}
+
+
+def weakness_from_stats(stats, min_count=2, limit=20):
+    """
+    Build a weakness profile from key latency statistics
+
+    A key or pair is weak when its mean latency is above the typist's
+    overall mean, or when it is often mistyped.
+
+    Args:
+        stats: KeyLatencyStats from a completed test
+        min_count: Minimum keystrokes before a key or pair is judged
+        limit: Number of weakest features kept
+
+    Returns:
+        dict: Feature id -> weight
+    """
+    total_count = sum(stats.key_counts)
+    if total_count == 0:
+        return {}
+    overall_mean = sum(stats.key_latency_ns) / total_count
+
+    def weight(latency, count, errors):
+        slowness = max(0.0, latency / count / overall_mean - 1) if overall_mean > 0 else 0.0
+        return slowness + 2 * errors / count
+
+    weights = {}
+    for slot, count in enumerate(stats.key_counts):
+        if count >= min_count:
+            weights[slot] = weight(stats.key_latency_ns[slot], count, stats.key_errors[slot])
+    for row, count in enumerate(stats.bigram_counts):
+        if count >= min_count:
+            weights[KEY_SLOTS + stats.bigram_pairs[row]] = weight(
+                stats.bigram_latency_ns[row], count, stats.bigram_errors[row])
+
+    strongest = sorted(weights.items(), key=lambda item: item[1], reverse=True)[:limit]
+    return {feature: value for feature, value in strongest if value > 0}
+
+
+def merge_weakness(previous, latest, decay=0.5):
+    """Blend a new weakness profile into an existing one, fading old weaknesses"""
+    merged = {feature: value * decay for feature, value in previous.items()}
+    for feature, value in latest.items():
+        merged[feature] = merged.get(feature, 0.0) + value
+    return {feature: value for feature, value in merged.items() if value > 0.01}
+
+
+class NgramIndex:
+    """Inverted index of per-passage character and pair densities"""
+
+    def __init__(self, passages=()):
+        """
+        Args:
+            passages: Iterable of passage texts; a passage's id is its position
+        """
+        # feature -> (passage ids in ascending order, densities)
+        self.postings = {}
+        self.size = 0
+        for passage_id, text in enumerate(passages):
+            for feature, density in passage_features(text).items():
+                ids, densities = self.postings.get(feature, (None, None))
+                if ids is None:
+                    ids, densities = array('I'), array('f')
+                    self.postings[feature] = (ids, densities)
+                ids.append(passage_id)
+                densities.append(density)
+            self.size = passage_id + 1
+
+    @classmethod
+    def from_columns(cls, features, starts, ids, densities, size):
+        """
+        Rebuild an index from the columns returned by columns()
+
+        The postings are slices of the given sequences, so memory-mapped
+        columns are used without copying.
+        """
+        index = cls()
+        for position, feature in enumerate(features):
+            first, last = starts[position], starts[position + 1]
+            index.postings[feature] = (ids[first:last], densities[first:last])
+        index.size = size
+        return index
+
+    def columns(self):
+        """
+        Flatten the postings for storage
+
+        Returns:
+            tuple: (features, posting start per feature plus the end, passage
+                ids, densities) as arrays, features in ascending order
+        """
+        features = array('I', sorted(self.postings))
+        starts = array('Q', [0])
+        ids = array('I')
+        densities = array('f')
+        for feature in features:
+            feature_ids, feature_densities = self.postings[feature]
+            ids.extend(feature_ids)
+            densities.extend(feature_densities)
+            starts.append(len(ids))
+        return features, starts, ids, densities
+
+    def score(self, weakness, start=0, end=None):
+        """
+        Score passages against a weakness profile
+
+        Args:
+            weakness: Feature id -> weight
+            start: First passage id considered
+            end: End of the passage id range considered (all if None)
+
+        Returns:
+            dict: Passage id -> score, for passages containing a weak feature
+        """
+        end = self.size if end is None else end
+        scores = {}
+        for feature, weight in weakness.items():
+            ids, densities = self.postings.get(feature, ((), ()))
+            # Postings are in passage id order: score only the [start, end) slice
+            first = bisect_left(ids, start)
+            last = bisect_left(ids, end, first)
+            for passage_id, density in zip(ids[first:last], densities[first:last]):
+                scores[passage_id] = scores.get(passage_id, 0.0) + weight * density
+        return scores
+
+    def choose(self, weakness, start=0, end=None, top=5, rng=random, window=None):
+        """
+        Pick one of the best-scoring passages
+
+        Args:
+            weakness: Feature id -> weight
+            start: First passage id considered
+            end: End of the passage id range considered (all if None)
+            top: Number of best passages to choose between, for variety
+            rng: Random number generator
+            window: If set, score only a random run of this many passage ids
+                within the range, bounding the work on very large corpora
+
+        Returns:
+            int: Passage id, or None if no passage contains a weak feature
+        """
+        end = self.size if end is None else end
+        if window is not None and end - start > window:
+            start = rng.randrange(start, end - window + 1)
+            end = start + window
+        scores = self.score(weakness, start, end)
+        if not scores:
+            return None
+        best = sorted(scores, key=scores.get, reverse=True)[:top]
+        return rng.choice(best)
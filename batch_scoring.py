@@ -0,0 +1,156 @@
+"""
+Batch Scoring Module
+Headless scoring of recorded typing sessions, with a command line interface.
+
+Usage:
+    python batch_scoring.py sessions.jsonl -o results.jsonl --workers 8
+
+Each input line is a JSON object:
+    {"id": ..., "sample_text": "...", "log": {...}, "elapsed_time": 60.0,
+     "test_mode": "fixed_time"}
+where "log" is a KeystrokeLog.to_dict() payload (older payloads with float
+second "timestamps" are still read). "id", "elapsed_time" and
+"test_mode" are optional.
+"""
+
+import argparse
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice, repeat
+
+from char_compare import batch_compare, has_numpy
+from keystroke_log import KeystrokeLog, ScoringRules, score_text
+
+
+def score_session(record, rules=None):
+    """
+    Score a single session record
+
+    Args:
+        record: Dictionary with "sample_text" and "log" (see module docstring)
+        rules: ScoringRules, or None for the default rules
+
+    Returns:
+        dict: Results with the same fields as TestController.get_results
+    """
+    log = KeystrokeLog.from_dict(record["log"])
+    return _score_replayed(record, log, log.replay_text(), rules)
+
+
+def _score_replayed(record, log, text, rules, counts=None):
+    """Score a session record whose log has already been replayed into text"""
+    elapsed_time = record.get("elapsed_time")
+    if elapsed_time is None:
+        elapsed_time = log.duration()
+    results = score_text(text, record["sample_text"], elapsed_time,
+                         record.get("test_mode", "fixed_time"), rules, log, counts)
+    if "id" in record:
+        results["id"] = record["id"]
+    return results
+
+
+def score_sessions(records, rules=None):
+    """Score an iterable of session records in the current process"""
+    return [score_session(record, rules) for record in records]
+
+
+def _score_lines(lines, rules_options):
+    """
+    Worker entry point: score a chunk of JSONL lines
+
+    Sessions typed against the same sample are compared in one
+    batch_compare call when characters are compared by position.
+    """
+    rules = ScoringRules(**rules_options)
+    records = [json.loads(line) for line in lines]
+    logs = [KeystrokeLog.from_dict(record["log"]) for record in records]
+    texts = [log.replay_text() for log in logs]
+
+    counts = [None] * len(records)
+    if rules.alignment == "position":
+        fold = (lambda text: text) if rules.case_sensitive else str.lower
+        groups = {}  # Compared sample -> indices of its sessions
+        for index, record in enumerate(records):
+            groups.setdefault(fold(record["sample_text"]), []).append(index)
+        for sample, indices in groups.items():
+            typed = [fold(texts[index]) for index in indices]
+            for index, session_counts in zip(indices, batch_compare(sample, typed)):
+                counts[index] = session_counts
+
+    return [json.dumps(_score_replayed(record, log, text, rules, session_counts))
+            for record, log, text, session_counts in zip(records, logs, texts, counts)]
+
+
+def _chunks(lines, chunk_size):
+    """Split an iterable of non-blank lines into lists of chunk_size"""
+    lines = (line for line in lines if line.strip())
+    while True:
+        chunk = list(islice(lines, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def score_file(input_file, output_file, workers=None, chunk_size=1000, rules_options=None):
+    """
+    Score a JSONL file of sessions across a process pool
+
+    Args:
+        input_file: Readable file of session records, one per line
+        output_file: Writable file receiving one result per line, in input order
+        workers: Number of worker processes (None uses the CPU count)
+        chunk_size: Number of sessions sent to a worker at a time
+        rules_options: Keyword arguments for ScoringRules
+
+    Returns:
+        int: Number of sessions scored
+    """
+    rules_options = rules_options or {}
+    count = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chunks = _chunks(input_file, chunk_size)
+        for output in executor.map(_score_lines, chunks, repeat(rules_options)):
+            for line in output:
+                output_file.write(line + "\n")
+            count += len(output)
+    return count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score recorded typing sessions")
+    parser.add_argument("input", help="JSONL file of sessions ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="Output JSONL file ('-' for stdout)")
+    parser.add_argument("--workers", type=int, default=None, help="Number of worker processes")
+    parser.add_argument("--chunk-size", type=int, default=1000, help="Sessions per worker task")
+    parser.add_argument("--chars-per-word", type=int, default=5, help="Characters per word for WPM")
+    parser.add_argument("--ignore-case", action="store_true", help="Ignore letter case when comparing")
+    parser.add_argument("--accuracy-basis", choices=("final", "keystrokes"), default="final",
+                        help="Score the final input or every typed keystroke")
+    parser.add_argument("--alignment", choices=("position", "word"), default="position",
+                        help="Compare characters by position or align words first")
+    args = parser.parse_args(argv)
+
+    rules_options = {
+        "chars_per_word": args.chars_per_word,
+        "case_sensitive": not args.ignore_case,
+        "accuracy_basis": args.accuracy_basis,
+        "alignment": args.alignment
+    }
+
+    input_file = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    output_file = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        count = score_file(input_file, output_file, args.workers, args.chunk_size, rules_options)
+    finally:
+        if input_file is not sys.stdin:
+            input_file.close()
+        if output_file is not sys.stdout:
+            output_file.close()
+
+    backend = "NumPy" if has_numpy() else "pure Python"
+    print(f"Scored {count} sessions ({backend} comparison)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+"""
+Benchmarks Module
+Performance benchmarks for the controller, text generator and UI hot paths.
+
+Usage:
+    python benchmarks.py --save baseline.json
+    python benchmarks.py --compare baseline.json --threshold 0.25
+
+Each benchmark reports seconds per operation (median of several rounds).
+With --compare, the run fails (exit status 1) if any benchmark is slower
+than its baseline by more than the threshold. The Tk benchmark needs a
+display (an Xvfb server works) and is skipped without one.
+
+The run also measures the memory held by each started server session
+(excluding its passage) and fails if it exceeds --memory-limit bytes.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from clock import FakeClock
+from test_controller import TestController
+from text_generator import TextGenerator
+from typing_server import SessionTable
+
+
+# Passage lengths used for the per-keystroke benchmarks
+PASSAGE_LENGTHS = (100, 1000, 10000, 100000)
+
+# Maximum memory per server session, excluding the passage, measured mid-test
+# after SESSION_MEMORY_KEYSTROKES characters (a 60 s test at 60 WPM). The
+# typed input and its match bitmap grow it by about 2 bytes per character;
+# everything else is bounded.
+SESSION_MEMORY_LIMIT = 2048
+SESSION_MEMORY_KEYSTROKES = 300
+
+# Registered benchmarks: name -> function returning seconds per operation
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """Register a benchmark function under a name"""
+    def register(function):
+        BENCHMARKS[name] = function
+        return function
+    return register
+
+
+def measure(operation, count, rounds=5):
+    """
+    Time an operation
+
+    Args:
+        operation: Function run once per round, performing count operations
+        count: Number of operations per round
+        rounds: Number of rounds
+
+    Returns:
+        float: Median seconds per operation
+    """
+    timings = []
+    for _ in range(rounds):
+        start = time.perf_counter_ns()
+        operation()
+        timings.append((time.perf_counter_ns() - start) / count / 1e9)
+    return statistics.median(timings)
+
+
+def make_passage(length):
+    """Build a passage of exactly length characters"""
+    stream = TextGenerator.get_text_stream("medium", seed=length)
+    chunks = []
+    total = 0
+    while total <= length:
+        chunk = next(stream)
+        chunks.append(chunk)
+        total += len(chunk)
+    return "".join(chunks)[1:length + 1]
+
+
+def _keystroke_benchmark(length, method, keystrokes=500, rounds=5, scoring="position"):
+    """Per-keystroke latency of typing the last keystrokes of a passage of length"""
+    passage = make_passage(length)
+    typed_before = max(0, length - keystrokes)
+    controller = TestController(clock=FakeClock(), scoring=scoring)
+    timings = []
+
+    for _ in range(rounds):
+        controller.start_test(mode="fixed_time", sample_text=passage)
+        controller.update_input(passage[:typed_before])
+
+        start = time.perf_counter_ns()
+        if method == "update_input":
+            for end in range(typed_before + 1, length + 1):
+                controller.update_input(passage[:end])
+        else:
+            for position in range(typed_before, length):
+                controller.apply_edit(position, 0, passage[position])
+        timings.append((time.perf_counter_ns() - start) / (length - typed_before) / 1e9)
+
+    return statistics.median(timings)
+
+
+for _method in ("update_input", "apply_edit"):
+    for _length in PASSAGE_LENGTHS:
+        benchmark(f"{_method}[{_length}]")(
+            lambda length=_length, method=_method: _keystroke_benchmark(length, method))
+
+for _length in PASSAGE_LENGTHS:
+    benchmark(f"apply_edit_word[{_length}]")(
+        lambda length=_length: _keystroke_benchmark(length, "apply_edit", scoring="word"))
+
+
+@benchmark("get_text")
+def bench_get_text():
+    def run():
+        for _ in range(10000):
+            TextGenerator.get_text("medium")
+    return measure(run, 10000)
+
+
+@benchmark("get_text_by_length")
+def bench_get_text_by_length():
+    def run():
+        for _ in range(10000):
+            TextGenerator.get_text_by_length(150, 300)
+    return measure(run, 10000)
+
+
+@benchmark("get_words_completed[10000]")
+def bench_get_words_completed():
+    passage = make_passage(10000)
+    controller = TestController(clock=FakeClock())
+    controller.start_test(mode="fixed_time", sample_text=passage)
+    controller.update_input(passage)
+
+    def run():
+        for _ in range(1000):
+            controller.get_words_completed()
+    return measure(run, 1000)
+
+
+@benchmark("tk_key_to_redraw")
+def bench_tk_key_to_redraw():
+    """Key event to redraw latency in TypingTestApp (needs a display)"""
+    import tkinter as tk
+    from typing_test_app import TypingTestApp
+
+    try:
+        root = tk.Tk()
+    except tk.TclError:
+        return None
+
+    # Results go to a scratch database, not the user's history
+    results_dir = tempfile.TemporaryDirectory()
+    saved_path = os.environ.get("TYPING_TEST_RESULTS_DB")
+    os.environ["TYPING_TEST_RESULTS_DB"] = os.path.join(results_dir.name, "results.db")
+    app = None
+    try:
+        app = TypingTestApp(root)
+        root.update()
+        app.test_mode.set("fixed_time")
+        app.start_test()
+        root.update()
+
+        keys = [char for char in app.sample_text[:200] if char.isalpha()]
+
+        def run():
+            for char in keys:
+                app.input_field.event_generate("<KeyPress>", keysym=char, when="now")
+                app.input_field.event_generate("<KeyRelease>", keysym=char, when="now")
+                root.update_idletasks()
+        return measure(run, len(keys), rounds=3)
+    finally:
+        # on_close stops the prefetcher and results store threads and destroys root
+        if app is not None:
+            app.on_close()
+        else:
+            root.destroy()
+        if saved_path is None:
+            del os.environ["TYPING_TEST_RESULTS_DB"]
+        else:
+            os.environ["TYPING_TEST_RESULTS_DB"] = saved_path
+        results_dir.cleanup()
+
+
+def session_memory(sessions=1000, keystrokes=0):
+    """
+    Measure the memory held by each started session, excluding its passage
+
+    Args:
+        sessions: Number of sessions opened for the measurement
+        keystrokes: Characters typed in each session before measuring
+
+    Returns:
+        float: Bytes per session
+    """
+    passage = make_passage(1000)  # Shared by every session, as the server does
+    table = SessionTable()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for _ in range(sessions):
+            _, controller = table.open()
+            controller.start_test(mode="fixed_text", sample_text=passage)
+            for position in range(keystrokes):
+                controller.apply_edit(position, 0, passage[position])
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return (after - before) / sessions
+
+
+def run_benchmarks(names):
+    """Run benchmarks by name, skipping ones that return None"""
+    results = {}
+    for name in names:
+        seconds = BENCHMARKS[name]()
+        if seconds is None:
+            print(f"{name:32s} skipped")
+            continue
+        results[name] = seconds
+        print(f"{name:32s} {seconds * 1e6:12.2f} us/op")
+    return results
+
+
+def compare(results, baseline, threshold):
+    """
+    Compare results with a baseline
+
+    Returns:
+        list: Names of benchmarks slower than baseline by more than threshold
+    """
+    regressions = []
+    for name, seconds in results.items():
+        previous = baseline.get(name)
+        if not previous:
+            continue
+        change = seconds / previous - 1
+        marker = "REGRESSION" if change > threshold else ""
+        print(f"{name:32s} {change:+8.1%} {marker}")
+        if change > threshold:
+            regressions.append(name)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run performance benchmarks")
+    parser.add_argument("--save", help="Write results to a JSON baseline file")
+    parser.add_argument("--compare", help="Compare results with a JSON baseline file")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed slowdown before failing (0.25 = 25%%)")
+    parser.add_argument("--filter", default="", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--memory-limit", type=float, default=SESSION_MEMORY_LIMIT,
+                        help=f"Maximum bytes per session after {SESSION_MEMORY_KEYSTROKES} keystrokes (default %(default)s)")
+    args = parser.parse_args(argv)
+
+    names = [name for name in BENCHMARKS if args.filter in name]
+    results = run_benchmarks(names)
+
+    print(f"{'session_memory':32s} {session_memory():12.0f} bytes/session")
+    memory = session_memory(keystrokes=SESSION_MEMORY_KEYSTROKES)
+    print(f"{f'session_memory[{SESSION_MEMORY_KEYSTROKES} keys]':32s} {memory:12.0f} bytes/session")
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as baseline_file:
+            json.dump({"python": platform.python_version(), "results": results},
+                      baseline_file, indent=2)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} benchmark(s) regressed: {', '.join(regressions)}")
+            sys.exit(1)
+
+    if memory > args.memory_limit:
+        print(f"Session memory {memory:.0f} bytes after {SESSION_MEMORY_KEYSTROKES} keystrokes "
+              f"exceeds the {args.memory_limit:.0f} byte limit")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
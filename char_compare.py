@@ -0,0 +1,123 @@
+"""
+Character Compare Module
+Character comparison backend, vectorized with NumPy when it is installed.
+
+NumPy is optional: without it every function falls back to pure Python
+and returns the same results.
+"""
+
+import operator
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is an optional dependency
+    np = None
+
+
+# Segments shorter than this are compared in pure Python, where the
+# NumPy conversion overhead would outweigh the vectorized comparison
+VECTOR_THRESHOLD = 256
+
+# Code point used to pad inputs in batch_compare (above the Unicode range)
+PADDING = 0xFFFFFFFF
+
+
+def has_numpy():
+    """Check if the vectorized backend is available"""
+    return np is not None
+
+
+def _code_points(text):
+    """Convert a string to an array of code points"""
+    return np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype="<u4")
+
+
+def match_mask(typed, sample):
+    """
+    Compare two strings position by position
+
+    Args:
+        typed: Typed text
+        sample: Sample text
+
+    Returns:
+        bytes: One byte per compared position, 1 if the characters match
+    """
+    length = min(len(typed), len(sample))
+    if np is not None and length >= VECTOR_THRESHOLD:
+        equal = _code_points(typed[:length]) == _code_points(sample[:length])
+        return equal.view(np.uint8).tobytes()
+    return bytes(map(operator.eq, typed[:length], sample[:length]))
+
+
+def count_matches(typed, sample):
+    """
+    Count matching and mismatching positions
+
+    Returns:
+        tuple: (correct_chars, incorrect_chars)
+    """
+    length = min(len(typed), len(sample))
+    if np is not None and length >= VECTOR_THRESHOLD:
+        correct = int(np.count_nonzero(_code_points(typed[:length]) == _code_points(sample[:length])))
+    else:
+        correct = sum(map(operator.eq, typed[:length], sample[:length]))
+    return correct, length - correct
+
+
+def batch_compare(sample, inputs, with_masks=False):
+    """
+    Compare many inputs typed against the same sample in one call
+
+    Args:
+        sample: Sample text shared by every input
+        inputs: List of typed texts
+        with_masks: If True, also return a per-position error mask for each input
+
+    Returns:
+        list: (correct_chars, incorrect_chars) per input, or
+            (correct_chars, incorrect_chars, error_mask) when with_masks is True,
+            where error_mask holds 1 for each incorrect compared position
+    """
+    if np is None or not inputs:
+        results = []
+        for typed in inputs:
+            mask = match_mask(typed, sample)
+            correct = mask.count(1)
+            if with_masks:
+                errors = bytes(1 - value for value in mask)
+                results.append((correct, len(mask) - correct, errors))
+            else:
+                results.append((correct, len(mask) - correct))
+        return results
+
+    lengths = np.fromiter((min(len(typed), len(sample)) for typed in inputs), dtype=np.int64,
+                          count=len(inputs))
+
+    # Only the sample prefix the longest input reaches is compared, so a long
+    # (or streamed) sample does not widen the matrix
+    width = int(lengths.max())
+
+    # Pack every input into one code point matrix, padded with a value no
+    # character has, so padding never matches the sample
+    matrix = np.full((len(inputs), width), PADDING, dtype="<u4")
+    for row, typed in enumerate(inputs):
+        length = lengths[row]
+        if length:
+            matrix[row, :length] = _code_points(typed[:length])
+
+    compared = np.arange(width) < lengths[:, None]
+    matches = (matrix == _code_points(sample[:width])) & compared
+    errors = compared & ~matches
+    correct = np.count_nonzero(matches, axis=1)
+
+    results = []
+    for row in range(len(inputs)):
+        row_correct = int(correct[row])
+        row_incorrect = int(lengths[row]) - row_correct
+        if with_masks:
+            mask = errors[row, :lengths[row]].view(np.uint8).tobytes()
+            results.append((row_correct, row_incorrect, mask))
+        else:
+            results.append((row_correct, row_incorrect))
+    return results
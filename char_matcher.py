@@ -0,0 +1,146 @@
+"""
+Character Matcher Module
+Incrementally compares typed input against the sample text.
+"""
+
+from char_compare import match_mask
+
+
+def find_edit(old_text, new_text):
+    """
+    Find the single edit that turns old_text into new_text
+
+    Args:
+        old_text: Previous input
+        new_text: Current input
+
+    Returns:
+        tuple: (position, removed_count, inserted_text)
+    """
+    old_len = len(old_text)
+    new_len = len(new_text)
+
+    # Fast paths for typing and backspacing at the end of the input
+    if new_len >= old_len and new_text.startswith(old_text):
+        return old_len, 0, new_text[old_len:]
+    if new_len < old_len and old_text.startswith(new_text):
+        return new_len, old_len - new_len, ""
+
+    # Common prefix (binary search over C-level slice comparisons)
+    low, high = 0, min(old_len, new_len)
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old_text[:middle] == new_text[:middle]:
+            low = middle
+        else:
+            high = middle - 1
+    prefix = low
+
+    # Common suffix, not overlapping the prefix
+    low, high = 0, min(old_len, new_len) - prefix
+    while low < high:
+        middle = (low + high + 1) // 2
+        if old_text[old_len - middle:] == new_text[new_len - middle:]:
+            low = middle
+        else:
+            high = middle - 1
+    suffix = low
+
+    return prefix, old_len - prefix - suffix, new_text[prefix:new_len - suffix]
+
+
+class CharMatcher:
+    """Tracks per-position correctness of typed input against a sample text"""
+
+    __slots__ = ("sample_text", "typed", "bitmap", "correct_chars", "incorrect_chars")
+
+    def __init__(self, sample_text=""):
+        self.reset(sample_text)
+
+    def reset(self, sample_text=""):
+        """Start matching against a new sample text"""
+        self.sample_text = sample_text
+        self.typed = ""
+        # One entry per compared position: 1 = correct, 0 = incorrect
+        self.bitmap = bytearray()
+        self.correct_chars = 0
+        self.incorrect_chars = 0
+
+    def update(self, new_text):
+        """
+        Replace the typed input, rescoring only the edited region
+
+        Args:
+            new_text: Full current input
+
+        Returns:
+            tuple: Changed bitmap range (start, old_end, new_end)
+        """
+        position, removed, inserted = find_edit(self.typed, new_text)
+        return self.apply_edit(position, removed, inserted)
+
+    def apply_edit(self, position, removed, inserted):
+        """
+        Apply an edit to the typed input
+
+        Args:
+            position: Index where the edit starts
+            removed: Number of characters removed at position
+            inserted: Text inserted at position
+
+        Returns:
+            tuple: Changed bitmap range (start, old_end, new_end)
+        """
+        old_text = self.typed
+        if removed == 0 and position == len(old_text):
+            new_text = old_text + inserted
+        else:
+            new_text = old_text[:position] + inserted + old_text[position + removed:]
+        self.typed = new_text
+
+        old_limit = len(self.bitmap)
+        new_limit = min(len(new_text), len(self.sample_text))
+        start = min(position, old_limit, new_limit)
+
+        if removed == len(inserted):
+            # In-place replacement: positions after the edit are unchanged
+            old_end = new_end = min(position + removed, new_limit)
+        else:
+            # Length changed: every following character has shifted
+            old_end = old_limit
+            new_end = new_limit
+
+        return self._rescore(start, old_end, new_end)
+
+    def extend_sample(self, text):
+        """
+        Append text to the sample, scoring input already typed past its old end
+
+        Returns:
+            tuple: Changed bitmap range (start, old_end, new_end)
+        """
+        self.sample_text += text
+        start = len(self.bitmap)
+        new_end = min(len(self.typed), len(self.sample_text))
+        return self._rescore(start, start, new_end)
+
+    def _rescore(self, start, old_end, new_end):
+        """Recompute bitmap[start:old_end] as positions start..new_end"""
+        old_segment = self.bitmap[start:old_end]
+        old_correct = old_segment.count(1)
+        self.correct_chars -= old_correct
+        self.incorrect_chars -= len(old_segment) - old_correct
+
+        new_segment = self._compare(start, new_end)
+        new_correct = new_segment.count(1)
+        self.correct_chars += new_correct
+        self.incorrect_chars += len(new_segment) - new_correct
+
+        self.bitmap[start:old_end] = new_segment
+        return start, old_end, new_end
+
+    def _compare(self, start, end):
+        """Compare typed and sample characters over [start, end)"""
+        if end <= start:
+            return b""
+        return match_mask(self.typed[start:end], self.sample_text[start:end])
@@ -0,0 +1,40 @@
+"""
+Clock Module
+Monotonic nanosecond clocks for test timing.
+"""
+
+import time
+
+
+NS_PER_SECOND = 1_000_000_000
+
+
+class MonotonicClock:
+    """High-resolution monotonic clock, unaffected by wall-clock adjustments"""
+
+    def __init__(self, source=time.perf_counter_ns):
+        """
+        Args:
+            source: Function returning integer nanoseconds
+                (time.perf_counter_ns or time.monotonic_ns)
+        """
+        self.source = source
+
+    def now_ns(self):
+        """Get the current time in integer nanoseconds"""
+        return self.source()
+
+
+class FakeClock:
+    """Manually advanced clock for deterministic tests and benchmarks"""
+
+    def __init__(self, start_ns=0):
+        self.current_ns = start_ns
+
+    def now_ns(self):
+        """Get the current time in integer nanoseconds"""
+        return self.current_ns
+
+    def advance(self, seconds=0, ns=0):
+        """Move the clock forward by seconds plus ns nanoseconds"""
+        self.current_ns += round(seconds * NS_PER_SECOND) + ns
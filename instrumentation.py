@@ -0,0 +1,226 @@
+"""
+Instrumentation Module
+Opt-in call counts and latency histograms for the typing test's hot paths.
+
+Enable with TYPING_TEST_INSTRUMENT=1 or `python typing_test_app.py --instrument`.
+Set TYPING_TEST_INSTRUMENT_OUTPUT (or --instrument-output) to a path ending
+in .json for the histograms, or .pstats/.prof for a cProfile dump of the
+whole session (read with `python -m pstats`); it is written at exit.
+
+The hot-path methods are wrapped only when instrumentation is enabled, so
+a normal run executes the original methods with no overhead at all. While
+enabled, F12 toggles a small overlay with live per-method statistics.
+"""
+
+import atexit
+import importlib
+import json
+import os
+import sys
+import time
+from array import array
+from functools import wraps
+
+
+OUTPUT_VARIABLE = "TYPING_TEST_INSTRUMENT_OUTPUT"
+
+# (module, class, method) wrapped when instrumentation is enabled
+HOT_PATHS = (
+    ("test_controller", "TestController", "update_input"),
+    ("test_controller", "TestController", "apply_edit"),
+    ("test_controller", "TestController", "update_time"),
+    ("typing_test_app", "TypingTestApp", "on_key_press"),
+    ("typing_test_app", "TypingTestApp", "on_key_release"),
+    ("typing_test_app", "TypingTestApp", "update_timer"),
+    ("typing_test_app", "TypingTestApp", "load_sample_text"),
+    ("results_window", "ResultsWindow", "create_ui"),
+)
+
+# Histogram buckets: bucket i counts durations of i significant bits (< 2**i ns)
+BUCKETS = 64
+
+# How often the overlay refreshes (milliseconds)
+OVERLAY_INTERVAL = 500
+
+# The active Instrumentation, or None when disabled
+active = None
+
+
+class MethodStats:
+    """Call count and log2 latency histogram of one method"""
+
+    __slots__ = ("name", "count", "total_ns", "max_ns", "buckets")
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets = array('Q', bytes(8 * BUCKETS))
+
+    def record(self, elapsed_ns):
+        """Add one call's duration"""
+        self.count += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+        self.buckets[min(elapsed_ns.bit_length(), BUCKETS - 1)] += 1
+
+    def percentile_ns(self, percent):
+        """Upper bound of the bucket holding a percentile (within a factor of two)"""
+        if self.count == 0:
+            return 0
+        rank = percent / 100 * self.count
+        seen = 0
+        for bucket, count in enumerate(self.buckets):
+            seen += count
+            if count and seen >= rank:
+                return min(1 << bucket, self.max_ns)
+        return self.max_ns
+
+    def to_dict(self):
+        """Statistics as a JSON-compatible dictionary"""
+        last = max((bucket for bucket, count in enumerate(self.buckets) if count), default=-1)
+        return {
+            "count": self.count,
+            "total_ms": round(self.total_ns / 1e6, 3),
+            "mean_us": round(self.total_ns / self.count / 1e3, 2) if self.count else 0,
+            "p50_us": round(self.percentile_ns(50) / 1e3, 2),
+            "p99_us": round(self.percentile_ns(99) / 1e3, 2),
+            "max_us": round(self.max_ns / 1e3, 2),
+            # Calls per bucket; bucket i holds durations below 2**i ns
+            "histogram_ns_log2": list(self.buckets[:last + 1])
+        }
+
+
+class Instrumentation:
+    """Wraps the hot-path methods and collects their statistics"""
+
+    def __init__(self, output=None):
+        """
+        Args:
+            output: File written at exit (.json histograms, or .pstats/.prof
+                cProfile dump); None to only show the overlay
+        """
+        self.output = output
+        self.stats = {}
+        self.originals = []  # (class, method name, original function) for uninstall
+        self.profiler = None
+        if output and not output.endswith(".json"):
+            import cProfile
+            self.profiler = cProfile.Profile()
+
+    def install(self, modules=None):
+        """
+        Wrap the HOT_PATHS methods
+
+        Args:
+            modules: Module name -> module object to patch instead of importing
+                it (the app passes itself when run as __main__)
+        """
+        modules = modules or {}
+        for module_name, class_name, method_name in HOT_PATHS:
+            module = modules.get(module_name) or importlib.import_module(module_name)
+            cls = getattr(module, class_name)
+            original = cls.__dict__[method_name]
+            stats = self.stats[f"{class_name}.{method_name}"] = MethodStats(f"{class_name}.{method_name}")
+            setattr(cls, method_name, timed(original, stats))
+            self.originals.append((cls, method_name, original))
+        if self.profiler is not None:
+            self.profiler.enable()
+
+    def uninstall(self):
+        """Restore the original methods"""
+        for cls, method_name, original in reversed(self.originals):
+            setattr(cls, method_name, original)
+        self.originals = []
+        if self.profiler is not None:
+            self.profiler.disable()
+
+    def to_dict(self):
+        """Statistics of every instrumented method"""
+        return {name: stats.to_dict() for name, stats in self.stats.items()}
+
+    def export(self):
+        """Write the statistics or profile to the output file, if any"""
+        if not self.output:
+            return
+        if self.profiler is not None:
+            self.profiler.disable()
+            self.profiler.dump_stats(self.output)
+        else:
+            with open(self.output, "w", encoding="utf-8") as output:
+                json.dump(self.to_dict(), output, indent=2)
+        print(f"instrumentation: wrote {self.output}", file=sys.stderr)
+
+
+def timed(function, stats):
+    """Wrap a function to record each call's duration in stats"""
+    clock = time.perf_counter_ns
+    record = stats.record
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        start = clock()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            record(clock() - start)
+
+    return wrapper
+
+
+def enable(output=None, modules=None):
+    """
+    Turn instrumentation on for the rest of the process
+
+    Args:
+        output: Export path (defaults to TYPING_TEST_INSTRUMENT_OUTPUT)
+        modules: Passed to Instrumentation.install
+
+    Returns:
+        Instrumentation: The active instance
+    """
+    global active
+    if active is None:
+        active = Instrumentation(output or os.environ.get(OUTPUT_VARIABLE))
+        active.install(modules)
+        atexit.register(active.export)
+    return active
+
+
+class DebugOverlay:
+    """Small live statistics panel in the corner of a window, toggled with F12"""
+
+    def __init__(self, root, instrumentation):
+        import tkinter as tk
+        self.root = root
+        self.instrumentation = instrumentation
+        self.label = tk.Label(root, justify=tk.LEFT, anchor="nw", font=("Courier", 8),
+                              bg="#202020", fg="#E0E0E0", padx=4, pady=2)
+        self.visible = False
+        self.refresh_id = None
+        root.bind("<F12>", lambda e: self.toggle(), add="+")
+        self.toggle()
+
+    def toggle(self):
+        """Show or hide the overlay"""
+        self.visible = not self.visible
+        if self.visible:
+            self.label.place(relx=1.0, rely=1.0, anchor="se")
+            self.label.lift()
+            self.refresh()
+        else:
+            self.label.place_forget()
+            if self.refresh_id is not None:
+                self.root.after_cancel(self.refresh_id)
+                self.refresh_id = None
+
+    def refresh(self):
+        """Redraw the statistics and book the next refresh"""
+        lines = [f"{'method':32s} {'calls':>7s} {'p50 us':>8s} {'p99 us':>8s} {'max us':>9s}"]
+        for name, stats in self.instrumentation.stats.items():
+            lines.append(f"{name:32s} {stats.count:7d} {stats.percentile_ns(50) / 1e3:8.1f} "
+                         f"{stats.percentile_ns(99) / 1e3:8.1f} {stats.max_ns / 1e3:9.1f}")
+        self.label.config(text="\n".join(lines))
+        self.refresh_id = self.root.after(OVERLAY_INTERVAL, self.refresh)
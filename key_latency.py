@@ -0,0 +1,149 @@
+"""
+Key Latency Module
+Per-key and per-bigram keystroke latency and error statistics.
+
+Per-key statistics live in fixed-size arrays indexed by character slot
+(printable ASCII plus one slot for everything else), so recording a
+keystroke is a handful of array updates. A test types only a few hundred
+of the 9216 possible slot pairs, so bigram statistics are kept in columns
+with one row per pair seen, found through a dict keyed by pair index.
+"""
+
+from array import array
+
+
+FIRST_CODE_POINT = 32                        # Space
+LAST_CODE_POINT = 126                        # Tilde
+OTHER_SLOT = LAST_CODE_POINT - FIRST_CODE_POINT + 1
+KEY_SLOTS = OTHER_SLOT + 1                   # Printable ASCII plus "other"
+
+# Latency histogram buckets: bucket b counts intervals of 2**(b-1) to 2**b - 1 ms
+HISTOGRAM_BUCKETS = 13
+
+NS_PER_MS = 1_000_000
+
+
+def key_slot(char):
+    """Get the array slot for a character"""
+    code_point = ord(char)
+    if FIRST_CODE_POINT <= code_point <= LAST_CODE_POINT:
+        return code_point - FIRST_CODE_POINT
+    return OTHER_SLOT
+
+
+def slot_char(slot):
+    """Get the character for a slot (None for the "other" slot)"""
+    if slot == OTHER_SLOT:
+        return None
+    return chr(slot + FIRST_CODE_POINT)
+
+
+class KeyLatencyStats:
+    """Inter-key latency and error statistics per key and per bigram"""
+
+    __slots__ = ("key_latency_ns", "key_counts", "key_errors", "key_histogram",
+                 "bigram_rows", "bigram_pairs", "bigram_latency_ns", "bigram_counts",
+                 "bigram_errors", "bigram_histogram")
+
+    def __init__(self):
+        self.key_latency_ns = array('q', bytes(8 * KEY_SLOTS))
+        self.key_counts = array('I', bytes(4 * KEY_SLOTS))
+        self.key_errors = array('I', bytes(4 * KEY_SLOTS))
+        self.key_histogram = array('I', bytes(4 * KEY_SLOTS * HISTOGRAM_BUCKETS))
+
+        # Bigram columns, one row per pair in the order first seen
+        self.bigram_rows = {}               # Pair index -> row
+        self.bigram_pairs = array('H')      # Pair index (first slot * KEY_SLOTS + second slot)
+        self.bigram_latency_ns = array('q')
+        self.bigram_counts = array('I')
+        self.bigram_errors = array('I')
+        self.bigram_histogram = array('I')  # HISTOGRAM_BUCKETS counts per row
+
+    def _add_bigram(self, pair):
+        """Add a row for a pair not seen before and return it"""
+        row = self.bigram_rows[pair] = len(self.bigram_pairs)
+        self.bigram_pairs.append(pair)
+        self.bigram_latency_ns.append(0)
+        self.bigram_counts.append(0)
+        self.bigram_errors.append(0)
+        self.bigram_histogram.extend(bytes(HISTOGRAM_BUCKETS))
+        return row
+
+    def record(self, expected_char, previous_char, interval_ns, correct):
+        """
+        Record one keystroke
+
+        Args:
+            expected_char: Sample character the typist was aiming for
+            previous_char: Sample character before it, or None at the start
+            interval_ns: Time since the previous keystroke in nanoseconds
+            correct: Whether the typed character matched
+        """
+        slot = key_slot(expected_char)
+        self.key_latency_ns[slot] += interval_ns
+        self.key_counts[slot] += 1
+        if not correct:
+            self.key_errors[slot] += 1
+        bucket = min(HISTOGRAM_BUCKETS - 1, (interval_ns // NS_PER_MS).bit_length())
+        self.key_histogram[slot * HISTOGRAM_BUCKETS + bucket] += 1
+
+        if previous_char is not None:
+            pair = key_slot(previous_char) * KEY_SLOTS + slot
+            row = self.bigram_rows.get(pair)
+            if row is None:
+                row = self._add_bigram(pair)
+            self.bigram_latency_ns[row] += interval_ns
+            self.bigram_counts[row] += 1
+            if not correct:
+                self.bigram_errors[row] += 1
+            self.bigram_histogram[row * HISTOGRAM_BUCKETS + bucket] += 1
+
+    def key_histogram_for(self, char):
+        """Get the latency histogram bucket counts for a character"""
+        start = key_slot(char) * HISTOGRAM_BUCKETS
+        return self.key_histogram[start:start + HISTOGRAM_BUCKETS].tolist()
+
+    def bigram_histogram_for(self, first, second):
+        """Get the latency histogram bucket counts for a character pair"""
+        row = self.bigram_rows.get(key_slot(first) * KEY_SLOTS + key_slot(second))
+        if row is None:
+            return [0] * HISTOGRAM_BUCKETS
+        start = row * HISTOGRAM_BUCKETS
+        return self.bigram_histogram[start:start + HISTOGRAM_BUCKETS].tolist()
+
+    @staticmethod
+    def _slowest(latencies, counts, errors, limit, min_count, label):
+        """Rank slots by mean latency"""
+        ranked = []
+        for slot, count in enumerate(counts):
+            if count >= min_count:
+                mean_ms = latencies[slot] / count / NS_PER_MS
+                ranked.append((mean_ms, slot, count))
+        ranked.sort(reverse=True)
+        return [(label(slot), round(mean_ms, 1), count, round(errors[slot] / count, 3))
+                for mean_ms, slot, count in ranked[:limit]]
+
+    def slowest_keys(self, limit=10, min_count=2):
+        """
+        Get the keys with the highest mean latency
+
+        Returns:
+            list: (char, mean_ms, count, error_rate) tuples, slowest first;
+                char is None for characters outside printable ASCII
+        """
+        return self._slowest(self.key_latency_ns, self.key_counts, self.key_errors,
+                             limit, min_count, slot_char)
+
+    def slowest_bigrams(self, limit=10, min_count=2):
+        """
+        Get the character pairs with the highest mean latency
+
+        Returns:
+            list: (pair, mean_ms, count, error_rate) tuples, slowest first
+        """
+        def pair_text(row):
+            first, second = divmod(self.bigram_pairs[row], KEY_SLOTS)
+            return (slot_char(first) or "?") + (slot_char(second) or "?")
+
+        return self._slowest(self.bigram_latency_ns, self.bigram_counts, self.bigram_errors,
+                             limit, min_count, pair_text)
@@ -0,0 +1,222 @@
+"""
+Keystroke Log Module
+Append-only keystroke event log with replayable scoring.
+"""
+
+from array import array
+
+from char_compare import count_matches
+from clock import NS_PER_SECOND
+from word_alignment import align_words, positional_word_errors
+
+
+# Key value recorded for a deleted character
+KEY_DELETE = -1
+
+
+class KeystrokeLog:
+    """Append-only log of keystroke events stored in compact array columns"""
+
+    __slots__ = ("timestamps", "keys", "positions", "correct")
+
+    def __init__(self):
+        self.timestamps = array('q')  # Nanoseconds since test start, as TestController counts
+        self.keys = array('i')        # Inserted code point, or KEY_DELETE
+        self.positions = array('I')   # Input index the event applies to
+        self.correct = array('b')     # 1 if the character matched the sample
+
+    def __len__(self):
+        return len(self.keys)
+
+    def append(self, timestamp, key, position, correct):
+        """Append a single event"""
+        self.timestamps.append(timestamp)
+        self.keys.append(key)
+        self.positions.append(position)
+        self.correct.append(1 if correct else 0)
+
+    def record_edit(self, timestamp, position, removed_text, inserted, sample_text):
+        """
+        Record an edit as one event per deleted or inserted character
+
+        Args:
+            timestamp: Nanoseconds since test start
+            position: Index where the edit starts
+            removed_text: Characters removed at position
+            inserted: Text inserted at position
+            sample_text: Sample text used to judge correctness
+        """
+        sample_length = len(sample_text)
+
+        # Deletions are logged back to front, the way backspace removes them
+        for offset in range(len(removed_text) - 1, -1, -1):
+            index = position + offset
+            correct = index < sample_length and removed_text[offset] == sample_text[index]
+            self.append(timestamp, KEY_DELETE, index, correct)
+
+        for offset, char in enumerate(inserted):
+            index = position + offset
+            correct = index < sample_length and char == sample_text[index]
+            self.append(timestamp, ord(char), index, correct)
+
+    def replay_text(self):
+        """Rebuild the final input text by replaying every event"""
+        chars = []
+        for key, position in zip(self.keys, self.positions):
+            if key == KEY_DELETE:
+                del chars[position]
+            elif position == len(chars):
+                chars.append(chr(key))
+            else:
+                chars.insert(position, chr(key))
+        return "".join(chars)
+
+    def duration(self):
+        """Seconds from test start to the last event"""
+        return self.timestamps[-1] / NS_PER_SECOND if len(self) else 0
+
+    def to_dict(self):
+        """Convert the log to a JSON-serializable dictionary"""
+        return {
+            "timestamps_ns": self.timestamps.tolist(),
+            "keys": self.keys.tolist(),
+            "positions": self.positions.tolist(),
+            "correct": self.correct.tolist()
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        """Create a log from a dictionary produced by to_dict"""
+        log = cls()
+        if "timestamps_ns" in data:
+            log.timestamps.extend(data["timestamps_ns"])
+        else:
+            # Older payloads store float seconds
+            log.timestamps.extend(round(seconds * NS_PER_SECOND) for seconds in data["timestamps"])
+        log.keys.extend(data["keys"])
+        log.positions.extend(data["positions"])
+        log.correct.extend(data["correct"])
+        return log
+
+
+class ScoringRules:
+    """Options controlling how a replayed session is scored"""
+
+    def __init__(self, chars_per_word=5, case_sensitive=True, accuracy_basis="final",
+                 alignment="position"):
+        """
+        Args:
+            chars_per_word: Characters counted as one word for WPM
+            case_sensitive: If False, letter case is ignored when comparing
+            accuracy_basis: "final" scores the final input (as TestController does),
+                "keystrokes" scores every typed character, including corrected ones
+            alignment: "position" compares characters position by position,
+                "word" aligns typed words with sample words first (see word_alignment)
+        """
+        self.chars_per_word = chars_per_word
+        self.case_sensitive = case_sensitive
+        self.accuracy_basis = accuracy_basis
+        self.alignment = alignment
+
+
+def score_text(text, sample_text, elapsed_time, test_mode="fixed_time", rules=None, log=None,
+               counts=None):
+    """
+    Score a final input text the same way TestController.get_results does
+
+    Args:
+        text: Final input text
+        sample_text: Sample text the input is compared against
+        elapsed_time: Test duration in seconds
+        test_mode: "fixed_time" or "fixed_text"
+        rules: ScoringRules, or None for the default rules
+        log: KeystrokeLog, required when rules.accuracy_basis is "keystrokes"
+        counts: (correct_chars, incorrect_chars) of the position-by-position
+            comparison, if already computed (see char_compare.batch_compare)
+
+    Returns:
+        dict: Results with the same fields as TestController.get_results
+    """
+    if rules is None:
+        rules = ScoringRules()
+
+    compared_text, compared_sample = text, sample_text
+    if not rules.case_sensitive:
+        compared_text, compared_sample = text.lower(), sample_text.lower()
+    total_chars = len(text)
+
+    if rules.alignment == "word":
+        aligner = align_words(compared_text, compared_sample)
+        incorrect_chars = aligner.incorrect_chars
+        correct_chars = max(0, total_chars - incorrect_chars)
+        word_errors = aligner.incorrect_words
+    else:
+        if counts is None:
+            counts = count_matches(compared_text, compared_sample)
+        correct_chars, incorrect_chars = counts
+        word_errors = positional_word_errors(compared_text, compared_sample)
+
+    if elapsed_time > 0:
+        wpm = max(0, (total_chars / rules.chars_per_word) / (elapsed_time / 60))
+    else:
+        wpm = 0
+
+    if rules.accuracy_basis == "keystrokes" and log is not None:
+        typed = [correct for key, correct in zip(log.keys, log.correct) if key != KEY_DELETE]
+        accuracy = (sum(typed) / len(typed)) * 100 if typed else 0
+    else:
+        accuracy = (correct_chars / total_chars) * 100 if total_chars > 0 else 0
+
+    return {
+        "wpm": round(wpm, 1),
+        "accuracy": round(accuracy, 1),
+        "time_taken": round(elapsed_time, 2),
+        "total_chars": total_chars,
+        "correct_chars": correct_chars,
+        "incorrect_chars": incorrect_chars,
+        "words_completed": len(text.split()),
+        "word_errors": word_errors,
+        "test_mode": test_mode
+    }
+
+
+def score_log(log, sample_text, elapsed_time=None, test_mode="fixed_time", rules=None):
+    """
+    Replay a keystroke log and score the resulting input
+
+    Args:
+        log: KeystrokeLog to replay
+        sample_text: Sample text used for the session
+        elapsed_time: Test duration in seconds; defaults to the last event time
+        test_mode: "fixed_time" or "fixed_text"
+        rules: ScoringRules, or None for the default rules
+
+    Returns:
+        dict: Results with the same fields as TestController.get_results
+    """
+    if elapsed_time is None:
+        elapsed_time = log.duration()
+    return score_text(log.replay_text(), sample_text, elapsed_time, test_mode, rules, log)
+
+
+def rescore_sessions(sessions, rules_list):
+    """
+    Re-score many saved sessions under several scoring rules
+
+    Each log is replayed once and then scored under every rule set.
+
+    Args:
+        sessions: Iterable of (log, sample_text, elapsed_time, test_mode) tuples
+        rules_list: List of ScoringRules
+
+    Returns:
+        list: One list of result dictionaries per session, in rules_list order
+    """
+    scored = []
+    for log, sample_text, elapsed_time, test_mode in sessions:
+        if elapsed_time is None:
+            elapsed_time = log.duration()
+        text = log.replay_text()
+        scored.append([score_text(text, sample_text, elapsed_time, test_mode, rules, log)
+                       for rules in rules_list])
+    return scored
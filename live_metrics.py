@@ -0,0 +1,134 @@
+"""
+Live Metrics Module
+Constant-time rolling typing speed and incremental word counting.
+"""
+
+from array import array
+
+from clock import NS_PER_SECOND
+
+
+def word_count_delta(old_text, new_text, position, removed, inserted_length):
+    """
+    Change in whitespace-separated word count caused by an edit
+
+    Only the words touching the edit are recounted, matching len(text.split()).
+
+    Args:
+        old_text: Input before the edit
+        new_text: Input after the edit
+        position: Index where the edit starts
+        removed: Number of characters removed at position
+        inserted_length: Number of characters inserted at position
+
+    Returns:
+        int: New word count minus old word count
+    """
+    # Widen the edited region to whole words on both sides
+    low = position
+    while low > 0 and not old_text[low - 1].isspace():
+        low -= 1
+
+    old_high = position + removed
+    while old_high < len(old_text) and not old_text[old_high].isspace():
+        old_high += 1
+
+    new_high = position + inserted_length
+    while new_high < len(new_text) and not new_text[new_high].isspace():
+        new_high += 1
+
+    return len(new_text[low:new_high].split()) - len(old_text[low:old_high].split())
+
+
+class LiveMetrics:
+    """Rolling-window typing speed backed by a ring buffer of keystroke times"""
+
+    __slots__ = ("windows", "capacity", "timestamps", "counts", "sequence",
+                 "typed_chars", "window_state")
+
+    def __init__(self, windows=(5, 15), capacity=1024):
+        """
+        Args:
+            windows: Rolling window lengths in seconds; empty to keep only the
+                typed total (raw WPM), with no ring buffer
+            capacity: Ring buffer size; must exceed the keystroke batches
+                typed within the longest window
+        """
+        self.windows = tuple(windows)
+        self.capacity = capacity
+        # Ring buffer columns grow to capacity as batches arrive, then wrap
+        self.timestamps = array('q')  # Nanoseconds
+        self.counts = array('I')      # Characters per batch
+        self.reset()
+
+    def reset(self):
+        """Forget all recorded keystrokes"""
+        self.sequence = 0        # Number of batches recorded
+        self.typed_chars = 0     # Characters typed, including corrected ones
+        # Per configured window, in order: oldest batch sequence in the
+        # window, then characters in the window
+        self.window_state = array('q', bytes(16 * len(self.windows)))
+
+    def record(self, timestamp_ns, count=1):
+        """
+        Record typed characters
+
+        Args:
+            timestamp_ns: Elapsed test time in nanoseconds
+            count: Number of characters typed at that time
+        """
+        self.typed_chars += count
+        if not self.windows:
+            return
+        slot = self.sequence % self.capacity
+        if slot < len(self.timestamps):
+            self.timestamps[slot] = timestamp_ns
+            self.counts[slot] = count
+        else:
+            self.timestamps.append(timestamp_ns)
+            self.counts.append(count)
+        self.sequence += 1
+        state = self.window_state
+        for index in range(1, len(state), 2):
+            state[index] += count
+
+    def _expire(self, window, now_ns):
+        """Drop batches older than the window; amortized O(1)"""
+        state = self.window_state
+        index = 2 * self.windows.index(window)
+        cutoff = now_ns - window * NS_PER_SECOND
+        oldest = max(state[index], self.sequence - self.capacity)
+        chars = state[index + 1]
+        if oldest != state[index]:
+            # Batches overwritten in the ring: recount what remains
+            chars = sum(self.counts[sequence % self.capacity]
+                        for sequence in range(oldest, self.sequence))
+        while oldest < self.sequence and self.timestamps[oldest % self.capacity] <= cutoff:
+            chars -= self.counts[oldest % self.capacity]
+            oldest += 1
+        state[index] = oldest
+        state[index + 1] = chars
+        return chars
+
+    def rolling_wpm(self, window, now_ns):
+        """
+        Typing speed over the trailing window
+
+        Args:
+            window: One of the configured window lengths in seconds
+            now_ns: Current elapsed test time in nanoseconds
+
+        Returns:
+            float: Words per minute (5 characters per word)
+        """
+        chars = self._expire(window, now_ns)
+        seconds = min(window, now_ns / NS_PER_SECOND)
+        if seconds <= 0:
+            return 0
+        return (chars / 5) / (seconds / 60)
+
+    def raw_wpm(self, now_ns):
+        """Words per minute over every typed character, including corrected ones"""
+        if now_ns <= 0:
+            return 0
+        return (self.typed_chars / 5) / (now_ns / NS_PER_SECOND / 60)
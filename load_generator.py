@@ -0,0 +1,194 @@
+"""
+Load Generator Module
+Simulates many concurrent typists against a typing server and reports
+keystroke-to-acknowledgement latency.
+
+Usage:
+    python typing_server.py &
+    python load_generator.py --typists 2000 --connections 50 --duration 30
+
+Typists share connections; the server answers each connection's requests
+in order, so acknowledgements are matched to requests first in, first out.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import deque
+
+
+class Connection:
+    """One TCP connection carrying requests from several typists"""
+
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.waiting = deque()  # Futures for requests awaiting a response, in send order
+        self.receiver = asyncio.ensure_future(self._receive())
+
+    @classmethod
+    async def open(cls, host, port):
+        reader, writer = await asyncio.open_connection(host, port)
+        return cls(reader, writer)
+
+    async def _receive(self):
+        """Resolve waiting requests with response lines, in order"""
+        while True:
+            line = await self.reader.readline()
+            if not line:
+                break
+            future = self.waiting.popleft()
+            if not future.done():
+                future.set_result(json.loads(line))
+        while self.waiting:
+            future = self.waiting.popleft()
+            if not future.done():
+                future.set_exception(ConnectionError("Server closed the connection"))
+
+    async def request(self, message):
+        """
+        Send a request and wait for its response
+
+        Returns:
+            tuple: (response, round-trip latency in nanoseconds)
+        """
+        future = asyncio.get_running_loop().create_future()
+        self.waiting.append(future)
+        sent_ns = time.perf_counter_ns()
+        self.writer.write(json.dumps(message).encode("utf-8") + b"\n")
+        response = await future
+        return response, time.perf_counter_ns() - sent_ns
+
+    async def close(self):
+        self.writer.close()
+        await self.writer.wait_closed()
+        self.receiver.cancel()
+
+
+def key_interval(rng, wpm):
+    """Seconds between keystrokes for a typist at wpm, with natural variation"""
+    mean = 60 / (wpm * 5)
+    return max(0.01, rng.gauss(mean, mean * 0.3))
+
+
+async def run_typist(connection, rng, deadline, latencies, totals, args):
+    """
+    Type one session after another until the deadline
+
+    Args:
+        connection: Shared Connection
+        rng: Random number generator for this typist
+        deadline: perf_counter time at which to stop
+        latencies: List collecting key acknowledgement latencies (ns)
+        totals: Dictionary of counters (sessions, errors)
+        args: Parsed command line options
+    """
+    wpm = rng.uniform(args.min_wpm, args.max_wpm)
+    while time.perf_counter() < deadline:
+        response, _ = await connection.request({"op": "start", "mode": args.mode,
+                                                "difficulty": args.difficulty,
+                                                "time_limit": args.time_limit})
+        if response["op"] != "started":
+            totals["errors"] += 1
+            return
+        session = response["session"]
+        text = response["text"]
+        position = 0
+        completed = False
+
+        while not completed and time.perf_counter() < deadline:
+            await asyncio.sleep(key_interval(rng, wpm))
+            if position >= len(text):
+                break
+            # Occasionally mistype, then correct it with a backspace
+            if rng.random() < args.error_rate:
+                char = rng.choice("asdfghjkl")
+                keys = (char, "\b", text[position]) if char != text[position] else (char,)
+            else:
+                keys = (text[position],)
+
+            for key in keys:
+                response, latency = await connection.request({"op": "key", "session": session,
+                                                              "char": key})
+                if response["op"] != "ack":
+                    totals["errors"] += 1
+                    return
+                latencies.append(latency)
+                text += response.get("append", "")
+                completed = response["completed"]
+                if completed:
+                    break
+            position += 1
+
+        if not completed:
+            await connection.request({"op": "finish", "session": session})
+        totals["sessions"] += 1
+
+
+def percentile(sorted_values, percent):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return 0
+    index = min(len(sorted_values) - 1, max(0, round(percent / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run_load(args):
+    """Start the typists and collect their latencies"""
+    connections = [await Connection.open(args.host, args.port)
+                   for _ in range(args.connections)]
+    latencies = []
+    totals = {"sessions": 0, "errors": 0}
+    started = time.perf_counter()
+    deadline = started + args.duration
+
+    async def start_typist(index):
+        # Spread typists over the ramp-up period
+        await asyncio.sleep(args.ramp * index / args.typists)
+        rng = random.Random(args.seed + index)
+        await run_typist(connections[index % len(connections)], rng, deadline,
+                         latencies, totals, args)
+
+    await asyncio.gather(*(start_typist(index) for index in range(args.typists)))
+    elapsed = time.perf_counter() - started
+
+    for connection in connections:
+        await connection.close()
+    return latencies, totals, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate concurrent typists against a typing server")
+    parser.add_argument("--host", default="127.0.0.1", help="Server address")
+    parser.add_argument("--port", type=int, default=8765, help="Server port")
+    parser.add_argument("--typists", type=int, default=1000, help="Concurrent simulated typists")
+    parser.add_argument("--connections", type=int, default=50,
+                        help="TCP connections shared by the typists")
+    parser.add_argument("--duration", type=float, default=30, help="Seconds to run")
+    parser.add_argument("--ramp", type=float, default=5, help="Seconds over which typists start")
+    parser.add_argument("--mode", choices=("fixed_text", "fixed_time"), default="fixed_text")
+    parser.add_argument("--difficulty", default="medium", help="easy, medium or hard")
+    parser.add_argument("--time-limit", type=float, default=60, help="Seconds per fixed-time test")
+    parser.add_argument("--min-wpm", type=float, default=30, help="Slowest simulated typing speed")
+    parser.add_argument("--max-wpm", type=float, default=100, help="Fastest simulated typing speed")
+    parser.add_argument("--error-rate", type=float, default=0.03,
+                        help="Fraction of keystrokes mistyped and corrected")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    args = parser.parse_args(argv)
+
+    latencies, totals, elapsed = asyncio.run(run_load(args))
+    latencies.sort()
+    ms = 1_000_000
+    print(f"Typists: {args.typists} over {args.connections} connections, {elapsed:.1f} s")
+    print(f"Sessions: {totals['sessions']}, errors: {totals['errors']}")
+    print(f"Keystrokes: {len(latencies)} ({len(latencies) / elapsed:.0f}/s)")
+    print(f"Ack latency: p50 {percentile(latencies, 50) / ms:.2f} ms, "
+          f"p90 {percentile(latencies, 90) / ms:.2f} ms, "
+          f"p99 {percentile(latencies, 99) / ms:.2f} ms, "
+          f"max {(latencies[-1] if latencies else 0) / ms:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
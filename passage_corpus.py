@@ -0,0 +1,339 @@
+"""
+Passage Corpus Module
+Indexed on-disk passage corpus, loaded lazily through memory mapping.
+
+File layout (little-endian):
+    header   magic b"TSPC", version, passage count per difficulty, uint64
+             offset of the n-gram index (0 if absent) (padded to 32 bytes)
+    offsets  uint64 byte offset of each passage body
+    sizes    uint32 byte size of each passage body
+    lengths  uint32 character length of each passage
+    bodies   UTF-8 passage text
+    n-grams  adaptive_selection.NgramIndex columns, 8-byte aligned: feature
+             count, posting count, uint64 posting starts, uint32 features,
+             uint32 passage ids, float32 densities
+
+Passages are grouped by difficulty ("easy", "medium", "hard") and sorted by
+length within each group, so difficulty and length-range lookups are a
+bisect over the index. Passage bodies are only decoded when selected.
+The n-gram index for weak-key passage selection is built with the file,
+so the application only maps it.
+
+Usage:
+    python passage_corpus.py corpus.tsc --easy easy.txt --medium medium.txt --hard hard.txt
+
+Each input file holds one passage per line. Without input files the
+built-in TextGenerator passages are written.
+"""
+
+import argparse
+import mmap
+import random
+import struct
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+
+from adaptive_selection import NgramIndex
+
+
+DIFFICULTIES = ("easy", "medium", "hard")
+
+MAGIC = b"TSPC"
+VERSION = 2
+READABLE_VERSIONS = (1, 2)  # Version 1 files have no n-gram index
+HEADER = struct.Struct("<4sI3IQ4x")  # 32 bytes, keeps the index arrays aligned
+NGRAM_HEADER = struct.Struct("<IIQ")  # Feature count, reserved, posting count
+
+
+def build_corpus(path, passages_by_difficulty, ngram_index=True):
+    """
+    Write an indexed corpus file
+
+    Args:
+        path: Output file path
+        passages_by_difficulty: Dictionary mapping difficulty to a list of passages
+        ngram_index: Also write the n-gram index used for weak-key selection
+    """
+    sections = []
+    for difficulty in DIFFICULTIES:
+        passages = passages_by_difficulty.get(difficulty, [])
+        sections.append(sorted(passages, key=len))
+
+    offsets = array('Q')
+    sizes = array('I')
+    lengths = array('I')
+    bodies = []
+    total = sum(len(section) for section in sections)
+    offset = HEADER.size + total * (8 + 4 + 4)
+
+    for section in sections:
+        for passage in section:
+            body = passage.encode("utf-8")
+            offsets.append(offset)
+            sizes.append(len(body))
+            lengths.append(len(passage))
+            bodies.append(body)
+            offset += len(body)
+
+    if sys.byteorder != "little":
+        for column in (offsets, sizes, lengths):
+            column.byteswap()
+
+    ngram_offset = 0
+    if ngram_index:
+        index = NgramIndex(passage for section in sections for passage in section)
+        columns = index.columns()
+        if sys.byteorder != "little":
+            for column in columns:
+                column.byteswap()
+        ngram_offset = (offset + 7) & ~7
+
+    with open(path, "wb") as corpus_file:
+        corpus_file.write(HEADER.pack(MAGIC, VERSION, *(len(section) for section in sections),
+                                      ngram_offset))
+        corpus_file.write(offsets.tobytes())
+        corpus_file.write(sizes.tobytes())
+        corpus_file.write(lengths.tobytes())
+        for body in bodies:
+            corpus_file.write(body)
+        if ngram_offset:
+            features, starts, ids, densities = columns
+            corpus_file.write(bytes(ngram_offset - offset))
+            corpus_file.write(NGRAM_HEADER.pack(len(features), 0, len(ids)))
+            for column in (starts, features, ids, densities):
+                corpus_file.write(column.tobytes())
+
+
+class PassageCorpus:
+    """Read-only view of an indexed corpus file"""
+
+    def __init__(self, path):
+        """
+        Args:
+            path: Corpus file written by build_corpus (opened on first use)
+        """
+        self.path = path
+        self._file = None
+        self._map = None
+        self._sections = None  # difficulty -> (start, end) index range
+        self._offsets = None
+        self._sizes = None
+        self._lengths = None
+        self._ngram_offset = 0
+        self._ngram_columns = None
+        self._ngram_index = None
+
+    def _open(self):
+        """Memory map the corpus file and index on first access"""
+        if self._map is not None:
+            return
+
+        self._file = open(self.path, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, *counts, ngram_offset = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC or version not in READABLE_VERSIONS:
+            self.close()
+            raise ValueError(f"{self.path} is not a passage corpus file")
+        self._ngram_offset = ngram_offset
+
+        total = sum(counts)
+        self._sections = {}
+        start = 0
+        for difficulty, count in zip(DIFFICULTIES, counts):
+            self._sections[difficulty] = (start, start + count)
+            start += count
+
+        view = memoryview(self._map)
+        position = HEADER.size
+        self._offsets = self._column(view, position, total, 'Q')
+        position += total * 8
+        self._sizes = self._column(view, position, total, 'I')
+        position += total * 4
+        self._lengths = self._column(view, position, total, 'I')
+
+    @staticmethod
+    def _column(view, position, count, typecode):
+        """Return an index column, zero-copy on little-endian machines"""
+        itemsize = struct.calcsize(typecode)
+        raw = view[position:position + count * itemsize]
+        if sys.byteorder == "little":
+            return raw.cast(typecode)
+        column = array(typecode, raw.tobytes())
+        column.byteswap()
+        return column
+
+    def close(self):
+        """Release the memory map and file handle"""
+        for column in (self._offsets, self._sizes, self._lengths, *(self._ngram_columns or ())):
+            if isinstance(column, memoryview):
+                column.release()
+        self._offsets = self._sizes = self._lengths = None
+        self._ngram_columns = self._ngram_index = None
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                pass  # An n-gram index handed out still maps the file; it is unmapped with it
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._sections = None
+
+    def __len__(self):
+        self._open()
+        return len(self._lengths)
+
+    def count(self, difficulty=None):
+        """Number of passages, optionally for a single difficulty"""
+        start, end = self._section(difficulty)
+        return end - start
+
+    def _section(self, difficulty):
+        """Index range for a difficulty, or the whole corpus for None"""
+        self._open()
+        if difficulty is None:
+            return 0, len(self._lengths)
+        return self._sections.get(difficulty.lower(), self._sections["medium"])
+
+    def index_range(self, difficulty=None):
+        """(start, end) index positions of a difficulty, or of the whole corpus"""
+        return self._section(difficulty)
+
+    def ngram_index(self, build=False):
+        """
+        N-gram index of the passages, for weak-key selection
+
+        Args:
+            build: Build the index from the passages if the file has none
+                (version 1 files); slow for large corpora, so only do this
+                off the UI thread
+
+        Returns:
+            NgramIndex: Index by passage position, or None if the file has
+                none and build is False
+        """
+        self._open()
+        if self._ngram_index is None:
+            if self._ngram_offset:
+                self._ngram_index = self._read_ngram_index()
+            elif build:
+                self._ngram_index = NgramIndex(self.get_passage(index)
+                                               for index in range(len(self._lengths)))
+        return self._ngram_index
+
+    def _read_ngram_index(self):
+        """Map the stored n-gram index columns"""
+        feature_count, _, posting_count = NGRAM_HEADER.unpack_from(self._map, self._ngram_offset)
+        view = memoryview(self._map)
+        position = self._ngram_offset + NGRAM_HEADER.size
+        starts = self._column(view, position, feature_count + 1, 'Q')
+        position += (feature_count + 1) * 8
+        features = self._column(view, position, feature_count, 'I')
+        position += feature_count * 4
+        ids = self._column(view, position, posting_count, 'I')
+        position += posting_count * 4
+        densities = self._column(view, position, posting_count, 'f')
+        self._ngram_columns = (starts, features, ids, densities)
+        return NgramIndex.from_columns(features, starts, ids, densities, len(self._lengths))
+
+    def get_passage(self, index):
+        """Decode the passage at an index position"""
+        self._open()
+        offset = self._offsets[index]
+        return self._map[offset:offset + self._sizes[index]].decode("utf-8")
+
+    def random_passage(self, difficulty=None, rng=random):
+        """Pick a random passage, optionally within a difficulty"""
+        start, end = self._section(difficulty)
+        if start == end:
+            return ""
+        return self.get_passage(rng.randrange(start, end))
+
+    def first_passage(self, difficulty=None):
+        """Return the first (shortest) passage of a difficulty"""
+        start, end = self._section(difficulty)
+        return self.get_passage(start) if start < end else ""
+
+    def length_ranges(self, min_length, max_length, difficulty=None):
+        """
+        Find index ranges of passages within a length range
+
+        Returns:
+            list: (start, end) index ranges, one per difficulty searched
+        """
+        difficulties = DIFFICULTIES if difficulty is None else (difficulty,)
+        ranges = []
+        for name in difficulties:
+            start, end = self._section(name)
+            low = bisect_left(self._lengths, min_length, start, end)
+            high = bisect_right(self._lengths, max_length, low, end)
+            if low < high:
+                ranges.append((low, high))
+        return ranges
+
+    def random_passage_by_length(self, min_length, max_length, difficulty=None, rng=random):
+        """
+        Pick a random passage within a length range
+
+        Returns:
+            str: Passage text, or None if no passage is in range
+        """
+        ranges = self.length_ranges(min_length, max_length, difficulty)
+        total = sum(high - low for low, high in ranges)
+        if total == 0:
+            return None
+
+        choice = rng.randrange(total)
+        for low, high in ranges:
+            if choice < high - low:
+                return self.get_passage(low + choice)
+            choice -= high - low
+
+    def closest_passage_by_length(self, target_length, difficulty=None):
+        """Return the passage whose length is closest to target_length"""
+        difficulties = DIFFICULTIES if difficulty is None else (difficulty,)
+        best_index = None
+        best_distance = None
+        for name in difficulties:
+            start, end = self._section(name)
+            position = bisect_left(self._lengths, target_length, start, end)
+            for index in (position - 1, position):
+                if start <= index < end:
+                    distance = abs(self._lengths[index] - target_length)
+                    if best_distance is None or distance < best_distance:
+                        best_index, best_distance = index, distance
+        return self.get_passage(best_index) if best_index is not None else ""
+
+
+def _read_passages(path):
+    """Read one passage per non-blank line"""
+    with open(path, encoding="utf-8") as passage_file:
+        return [line.strip() for line in passage_file if line.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build an indexed passage corpus")
+    parser.add_argument("output", help="Corpus file to write")
+    for difficulty in DIFFICULTIES:
+        parser.add_argument(f"--{difficulty}", help=f"Text file of {difficulty} passages, one per line")
+    args = parser.parse_args(argv)
+
+    passages = {difficulty: _read_passages(getattr(args, difficulty))
+                for difficulty in DIFFICULTIES if getattr(args, difficulty)}
+    if not passages:
+        from text_generator import TextGenerator
+        passages = {
+            "easy": TextGenerator.EASY_TEXTS,
+            "medium": TextGenerator.MEDIUM_TEXTS,
+            "hard": TextGenerator.HARD_TEXTS
+        }
+
+    build_corpus(args.output, passages)
+    print(f"Wrote {sum(len(texts) for texts in passages.values())} passages to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Passage Prefetcher Module
+Keeps the next few passages for each difficulty ready ahead of time.
+
+Passages are fetched on a worker thread, so picking a new passage on the
+Tk thread is a pop from a deque instead of a corpus read. After a passage
+is taken the worker tops its difficulty back up.
+
+A fetch that raises or returns an empty passage marks its difficulty as
+failed: no more fetches are queued for it until flush, and has_failed
+tells callers to stop waiting and fetch for themselves.
+"""
+
+import queue
+import threading
+from collections import deque
+
+
+class PassagePrefetcher:
+    """Background queue of ready passages per difficulty"""
+
+    def __init__(self, fetch, depth=3):
+        """
+        Args:
+            fetch: Function of a difficulty returning a passage; called on the
+                worker thread
+            depth: Passages kept ready per difficulty
+        """
+        self.fetch = fetch
+        self.depth = depth
+        self.lock = threading.Lock()
+        self.ready = {}     # difficulty -> deque of passages
+        self.pending = {}   # difficulty -> fetches queued for the worker
+        self.failed = set()  # Difficulties whose last fetch failed or came back empty
+        self.generation = 0  # Bumped by flush; older fetches are discarded
+        self.requests = queue.Queue()
+        self.worker = threading.Thread(target=self._run, name="PassagePrefetcher", daemon=True)
+        self.worker.start()
+
+    def prime(self, difficulties):
+        """Start filling the queues of several difficulties"""
+        for difficulty in difficulties:
+            self._top_up(difficulty)
+
+    def take(self, difficulty):
+        """
+        Get a ready passage
+
+        Returns:
+            str: A prefetched passage, or None if none is ready yet (the
+                caller fetches one itself)
+        """
+        with self.lock:
+            passages = self.ready.get(difficulty)
+            text = passages.popleft() if passages else None
+        self._top_up(difficulty)
+        return text
+
+    def has_failed(self, difficulty):
+        """Whether fetching stopped for a difficulty because a fetch failed or came back empty"""
+        with self.lock:
+            return difficulty in self.failed
+
+    def flush(self):
+        """Drop prefetched passages, e.g. after the corpus changed"""
+        with self.lock:
+            self.generation += 1
+            difficulties = list(self.ready)
+            self.ready.clear()
+            self.pending.clear()
+            self.failed.clear()
+        for difficulty in difficulties:
+            self._top_up(difficulty)
+
+    def close(self):
+        """Stop the worker thread"""
+        self.requests.put(None)
+
+    def _top_up(self, difficulty):
+        """Queue fetches until the difficulty has depth passages ready or coming"""
+        with self.lock:
+            if difficulty in self.failed:
+                return
+            ready = len(self.ready.setdefault(difficulty, deque()))
+            missing = self.depth - ready - self.pending.get(difficulty, 0)
+            if missing <= 0:
+                return
+            self.pending[difficulty] = self.pending.get(difficulty, 0) + missing
+            generation = self.generation
+        for _ in range(missing):
+            self.requests.put((difficulty, generation))
+
+    def _run(self):
+        """Worker thread: fetch requested passages"""
+        while True:
+            request = self.requests.get()
+            if request is None:
+                break
+            difficulty, generation = request
+            if generation != self.generation:
+                continue
+            try:
+                text = self.fetch(difficulty)
+            except Exception:
+                # Usually the corpus was replaced (and closed) mid-read, and
+                # flush re-requests; any other error must not end the worker
+                text = None
+            with self.lock:
+                if generation != self.generation:
+                    continue
+                self.pending[difficulty] -= 1
+                if text:
+                    self.ready[difficulty].append(text)
+                else:
+                    self.failed.add(difficulty)
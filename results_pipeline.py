@@ -0,0 +1,185 @@
+"""
+Results Pipeline Module
+Computes results analysis off the Tk main thread and delivers it in sections.
+
+Analyses run on a worker thread; finished sections are passed back through
+a queue that the Tk event loop polls with after(), so the UI never waits
+on results processing.
+"""
+
+import queue
+from concurrent.futures import ThreadPoolExecutor
+
+from clock import NS_PER_SECOND
+from keystroke_log import KEY_DELETE, ScoringRules, score_text
+from word_alignment import align_words
+
+
+def make_snapshot(controller):
+    """
+    Capture what the analyses need from a completed test
+
+    The controller starts a new keystroke log for every test, so the log
+    referenced here is not modified afterwards.
+
+    Returns:
+        dict: Results (a TestResult), keystroke log, sample text and final input
+    """
+    return {
+        "results": controller.get_result_record(),
+        "log": controller.keystroke_log,
+        "sample_text": controller.sample_text,
+        "user_input": controller.user_input,
+        "key_stats": controller.key_stats
+    }
+
+
+def analyze_keystrokes(snapshot):
+    """Keystroke totals, corrections and keystroke-level accuracy"""
+    log = snapshot["log"]
+    deletions = log.keys.count(KEY_DELETE)
+    typed = len(log) - deletions
+    typed_errors = sum(1 for key, correct in zip(log.keys, log.correct)
+                       if key != KEY_DELETE and not correct)
+
+    results = snapshot["results"]
+    keystroke_results = score_text(snapshot["user_input"], snapshot["sample_text"],
+                                   results.time_taken, results.test_mode,
+                                   ScoringRules(accuracy_basis="keystrokes"), log)
+    return {
+        "keystrokes": typed,
+        "corrections": deletions,
+        "typed_errors": typed_errors,
+        "keystroke_accuracy": keystroke_results["accuracy"]
+    }
+
+
+def analyze_speed(snapshot, bucket_seconds=5):
+    """
+    Typing speed over time, for charting
+
+    Returns:
+        list: (bucket end in seconds, WPM within the bucket) pairs
+    """
+    log = snapshot["log"]
+    duration = snapshot["results"].time_taken
+    buckets = [0] * (int(duration // bucket_seconds) + 1)
+    bucket_ns = bucket_seconds * NS_PER_SECOND
+    for timestamp_ns, key in zip(log.timestamps, log.keys):
+        if key != KEY_DELETE:
+            index = min(int(timestamp_ns // bucket_ns), len(buckets) - 1)
+            buckets[index] += 1
+
+    points = []
+    for index, chars in enumerate(buckets):
+        end = min(duration, (index + 1) * bucket_seconds)
+        span = end - index * bucket_seconds
+        if span > 0:
+            points.append((round(end, 1), round((chars / 5) / (span / 60), 1)))
+    return points
+
+
+def analyze_words(snapshot, limit=8):
+    """Mistyped, skipped and extra words, aligned word by word"""
+    details = align_words(snapshot["user_input"], snapshot["sample_text"]).word_details()
+    return {
+        "count": len(details),
+        "words": details[:limit]
+    }
+
+
+def analyze_latency(snapshot, limit=10):
+    """Slowest keys and bigrams by mean inter-key latency"""
+    stats = snapshot.get("key_stats")
+    if stats is None:
+        return None
+    return {
+        "keys": stats.slowest_keys(limit),
+        "bigrams": stats.slowest_bigrams(limit)
+    }
+
+
+# Default analyses: (section name, function taking a snapshot)
+DEFAULT_ANALYSES = (
+    ("keystrokes", analyze_keystrokes),
+    ("speed", analyze_speed),
+    ("words", analyze_words),
+    ("latency", analyze_latency),
+)
+
+
+class ResultsPipeline:
+    """Runs results analyses on a worker thread and delivers sections to Tk"""
+
+    # How often the Tk event loop checks for finished sections (milliseconds)
+    POLL_INTERVAL = 30
+
+    def __init__(self, root, analyses=DEFAULT_ANALYSES):
+        """
+        Args:
+            root: Tk root used to schedule polling
+            analyses: Sequence of (section name, function) pairs
+        """
+        self.root = root
+        self.analyses = list(analyses)
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="ResultsPipeline")
+        self.finished = queue.Queue()
+        self.job = 0
+        self.pending = 0
+        self.on_section = None
+        self.poll_id = None
+
+    def add_analysis(self, name, function):
+        """Register an additional analysis section"""
+        self.analyses.append((name, function))
+
+    def submit(self, snapshot, on_section):
+        """
+        Start analysing a test snapshot
+
+        Sections from an earlier, unfinished submission are discarded.
+
+        Args:
+            snapshot: Dictionary from make_snapshot
+            on_section: Called on the Tk thread as on_section(name, data) for
+                each finished section; data is None if the analysis failed
+        """
+        self.job += 1
+        self.pending = len(self.analyses)
+        self.on_section = on_section
+
+        for name, function in self.analyses:
+            self.executor.submit(self._run, self.job, name, function, snapshot)
+
+        if self.poll_id is None:
+            self.poll_id = self.root.after(self.POLL_INTERVAL, self._poll)
+
+    def _run(self, job, name, function, snapshot):
+        """Worker thread: run one analysis and queue its section"""
+        try:
+            data = function(snapshot)
+        except Exception:
+            data = None
+        self.finished.put((job, name, data))
+
+    def _poll(self):
+        """Tk thread: deliver finished sections, polling until none are pending"""
+        self.poll_id = None
+        while True:
+            try:
+                job, name, data = self.finished.get_nowait()
+            except queue.Empty:
+                break
+            if job == self.job:
+                self.pending -= 1
+                self.on_section(name, data)
+
+        if self.pending > 0:
+            self.poll_id = self.root.after(self.POLL_INTERVAL, self._poll)
+
+    def close(self):
+        """Stop polling and release the worker thread"""
+        if self.poll_id is not None:
+            self.root.after_cancel(self.poll_id)
+            self.poll_id = None
+        self.executor.shutdown(wait=False)
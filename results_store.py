@@ -0,0 +1,263 @@
+"""
+Results Store Module
+Persists test results in a local SQLite database and answers history queries.
+
+Writes are queued and committed in batches by a background thread, so
+saving a result never blocks the caller. Queries run inside SQLite.
+"""
+
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    user TEXT NOT NULL,
+    test_mode TEXT NOT NULL,
+    difficulty TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    wpm REAL NOT NULL,
+    accuracy REAL NOT NULL,
+    time_taken REAL NOT NULL,
+    total_chars INTEGER NOT NULL,
+    correct_chars INTEGER NOT NULL,
+    incorrect_chars INTEGER NOT NULL,
+    words_completed INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_results_user_timestamp
+    ON results (user, timestamp);
+CREATE INDEX IF NOT EXISTS idx_results_user_mode_difficulty_timestamp
+    ON results (user, test_mode, difficulty, timestamp);
+CREATE INDEX IF NOT EXISTS idx_results_user_wpm
+    ON results (user, wpm);
+"""
+
+INSERT = """
+INSERT INTO results (user, test_mode, difficulty, timestamp, wpm, accuracy, time_taken,
+                     total_chars, correct_chars, incorrect_chars, words_completed)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+# Result fields that can be ranked or averaged
+METRICS = ("wpm", "accuracy", "time_taken", "total_chars", "correct_chars",
+           "incorrect_chars", "words_completed")
+
+
+def default_path():
+    """Get the results database path (TYPING_TEST_RESULTS_DB overrides it)"""
+    path = os.environ.get("TYPING_TEST_RESULTS_DB")
+    if path:
+        return path
+    return os.path.join(os.path.expanduser("~"), ".typing_speed_test", "results.db")
+
+
+class ResultsStore:
+    """SQLite results store with a background writer thread"""
+
+    def __init__(self, path=None, batch_size=100):
+        """
+        Args:
+            path: Database file (default_path() if None)
+            batch_size: Maximum results committed in one transaction
+        """
+        self.path = path or default_path()
+        self.batch_size = batch_size
+        self._queue = queue.Queue()
+        self._ready = threading.Event()
+        self._error = None
+        self._open_error = None
+        self._read_connection = None
+        self._read_lock = threading.Lock()
+
+        self._writer = threading.Thread(target=self._write_loop, name="ResultsStoreWriter", daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        """Open a connection in WAL mode (each connection is used under one lock or thread)"""
+        connection = sqlite3.connect(self.path, timeout=10, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        return connection
+
+    def _write_loop(self):
+        """Create the schema, then commit queued results in batches"""
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = self._connect()
+            connection.executescript(SCHEMA)
+        except (OSError, sqlite3.Error) as error:
+            self._error = self._open_error = error
+            self._ready.set()
+            self._drain_after_error()
+            return
+        self._ready.set()
+
+        running = True
+        while running:
+            rows = [self._queue.get()]
+            # Collect whatever else is already waiting, up to a batch
+            while len(rows) < self.batch_size:
+                try:
+                    rows.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            if None in rows:
+                running = False
+            batch = [row for row in rows if row is not None]
+            try:
+                if batch:
+                    with connection:
+                        connection.executemany(INSERT, batch)
+            except sqlite3.Error as error:
+                self._error = error
+            finally:
+                for _ in rows:
+                    self._queue.task_done()
+
+        connection.close()
+
+    def _drain_after_error(self):
+        """Discard queued results when the database could not be opened"""
+        while True:
+            row = self._queue.get()
+            self._queue.task_done()
+            if row is None:
+                return
+
+    @property
+    def error(self):
+        """The last database error, if any"""
+        return self._error
+
+    def save(self, results, user, difficulty, timestamp=None):
+        """
+        Queue a result for saving without waiting for the database
+
+        Args:
+            results: Dictionary from TestController.get_results
+            user: User name
+            difficulty: Text difficulty used for the test
+            timestamp: Unix time of the test (now if None)
+        """
+        self._queue.put((
+            user, results["test_mode"], difficulty,
+            time.time() if timestamp is None else timestamp,
+            results["wpm"], results["accuracy"], results["time_taken"],
+            results["total_chars"], results["correct_chars"],
+            results["incorrect_chars"], results["words_completed"]
+        ))
+
+    def flush(self):
+        """Wait until every queued result has been committed"""
+        self._queue.join()
+
+    def close(self):
+        """Commit queued results and stop the writer thread"""
+        if self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+        with self._read_lock:
+            if self._read_connection is not None:
+                self._read_connection.close()
+                self._read_connection = None
+
+    def _query(self, sql, parameters):
+        """Run a read query and return all rows"""
+        self._ready.wait()
+        if self._open_error is not None:
+            raise self._open_error
+        with self._read_lock:
+            if self._read_connection is None:
+                self._read_connection = self._connect()
+                self._read_connection.row_factory = sqlite3.Row
+            return self._read_connection.execute(sql, parameters).fetchall()
+
+    @staticmethod
+    def _filters(user, test_mode, difficulty):
+        """Build a WHERE clause for the indexed filter columns"""
+        clauses = ["user = ?"]
+        parameters = [user]
+        if test_mode is not None:
+            clauses.append("test_mode = ?")
+            parameters.append(test_mode)
+        if difficulty is not None:
+            clauses.append("difficulty = ?")
+            parameters.append(difficulty)
+        return " AND ".join(clauses), parameters
+
+    @staticmethod
+    def _check_metric(metric):
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+
+    def personal_best(self, user, test_mode=None, difficulty=None, metric="wpm"):
+        """
+        Get the best result for a user
+
+        Returns:
+            dict: Best result row, or None if the user has no results
+        """
+        self._check_metric(metric)
+        where, parameters = self._filters(user, test_mode, difficulty)
+        rows = self._query(f"SELECT * FROM results WHERE {where} "
+                           f"ORDER BY {metric} DESC LIMIT 1", parameters)
+        return dict(rows[0]) if rows else None
+
+    def history(self, user, test_mode=None, difficulty=None, limit=20):
+        """Get the most recent results for a user, newest first"""
+        where, parameters = self._filters(user, test_mode, difficulty)
+        rows = self._query(f"SELECT * FROM results WHERE {where} "
+                           f"ORDER BY timestamp DESC LIMIT ?", parameters + [limit])
+        return [dict(row) for row in rows]
+
+    def moving_average(self, user, window=10, test_mode=None, difficulty=None,
+                       metric="wpm", limit=100):
+        """
+        Get a moving average of a metric over the user's recent results
+
+        Args:
+            window: Number of results averaged at each point
+            limit: Number of most recent points returned
+
+        Returns:
+            list: (timestamp, value, moving_average) tuples, oldest first
+        """
+        self._check_metric(metric)
+        where, parameters = self._filters(user, test_mode, difficulty)
+        rows = self._query(
+            f"SELECT timestamp, value, average FROM ("
+            f"  SELECT timestamp, {metric} AS value,"
+            f"         AVG({metric}) OVER (ORDER BY timestamp"
+            f"             ROWS BETWEEN ? PRECEDING AND CURRENT ROW) AS average"
+            f"  FROM results WHERE {where}"
+            f"  ORDER BY timestamp DESC LIMIT ?"
+            f") ORDER BY timestamp",
+            [window - 1] + parameters + [limit])
+        return [tuple(row) for row in rows]
+
+    def percentile(self, user, percent, test_mode=None, difficulty=None, metric="wpm"):
+        """
+        Get a percentile of a metric over the user's results (nearest rank)
+
+        Args:
+            percent: Percentile between 0 and 100
+
+        Returns:
+            float: Metric value, or None if the user has no results
+        """
+        self._check_metric(metric)
+        where, parameters = self._filters(user, test_mode, difficulty)
+        count = self._query(f"SELECT COUNT(*) FROM results WHERE {where}", parameters)[0][0]
+        if count == 0:
+            return None
+        offset = min(count - 1, max(0, round(percent / 100 * (count - 1))))
+        rows = self._query(f"SELECT {metric} FROM results WHERE {where} "
+                           f"ORDER BY {metric} LIMIT 1 OFFSET ?", parameters + [offset])
+        return rows[0][0]
@@ -10,39 +10,78 @@ from tkinter import ttk
 class ResultsWindow:
     """Window to display typing test results"""
     
-    def __init__(self, parent, results):
+    # Analysis sections shown below the summary, in display order
+    SECTION_TITLES = (
+        ("keystrokes", "Keystrokes"),
+        ("speed", "Speed (WPM)"),
+        ("words", "Word Errors"),
+        ("history", "History"),
+    )
+    
+    # Cells per heatmap row
+    HEATMAP_CELLS = 10
+    
+    # Window size in pixels; the height shrinks to fit smaller screens
+    WIDTH = 520
+    HEIGHT = 800
+    
+    # Screen height left for the title bar and taskbar when fitting the window
+    SCREEN_MARGIN = 80
+    
+    # Summary values: (TestResult field, label text, value font, color, format)
+    SUMMARY_FIELDS = (
+        ("wpm", "Words Per Minute:", ("Arial", 16, "bold"), "blue", "{}"),
+        ("accuracy", "Accuracy:", ("Arial", 14, "bold"), None, "{}%"),
+        ("time_taken", "Time Taken:", ("Arial", 12), None, "{} seconds"),
+    )
+    DETAIL_FIELDS = (
+        ("total_chars", "Total Characters:", ("Arial", 10), None, "{}"),
+        ("correct_chars", "Correct Characters:", ("Arial", 10), "green", "{}"),
+        ("incorrect_chars", "Incorrect Characters:", ("Arial", 10), "red", "{}"),
+        ("words_completed", "Words Completed:", ("Arial", 10), None, "{}"),
+        ("word_errors", "Words With Errors:", ("Arial", 10), None, "{}"),
+        ("test_mode", "Test Mode:", ("Arial", 10), None, "{}"),
+    )
+    
+    MODE_NAMES = {"fixed_time": "Fixed Time", "fixed_text": "Fixed Text"}
+    
+    def __init__(self, parent, results=None):
         """
         Initialize results window
         
+        The window is built once and hidden; show() fills it in for each test.
+        
         Args:
             parent: Parent window
-            results: Dictionary containing test results
+            results: TestResult, shown right away if given
         """
         self.parent = parent
         self.results = results
         
-        # Create window
+        # Create window, hidden until show()
         self.window = tk.Toplevel(parent)
+        self.window.withdraw()
         self.window.title("Test Results")
-        self.window.geometry("500x400")
         self.window.resizable(False, False)
+        self.window.transient(parent)
+        self.window.protocol("WM_DELETE_WINDOW", self.hide)
         
-        # Center window on parent
+        # Center window on the screen
         self.center_window()
         
-        # Make window modal
-        self.window.transient(parent)
-        self.window.grab_set()
-        
         self.create_ui()
         
+        if results is not None:
+            self.show(results)
+        
     def center_window(self):
-        """Center the window on the parent window"""
-        self.window.update_idletasks()
-        width = self.window.winfo_width()
-        height = self.window.winfo_height()
-        x = (self.window.winfo_screenwidth() // 2) - (width // 2)
-        y = (self.window.winfo_screenheight() // 2) - (height // 2)
+        """Center the window on the screen (its size is fixed, so no layout pass is needed)"""
+        screen_width = self.window.winfo_screenwidth()
+        screen_height = self.window.winfo_screenheight()
+        width = min(self.WIDTH, screen_width)
+        height = min(self.HEIGHT, screen_height - self.SCREEN_MARGIN)
+        x = max(0, (screen_width - width) // 2)
+        y = max(0, (screen_height - height) // 2)
         self.window.geometry(f'{width}x{height}+{x}+{y}')
         
     def create_ui(self):
@@ -51,6 +90,10 @@ class ResultsWindow:
         main_frame = ttk.Frame(self.window, padding="20")
         main_frame.pack(fill=tk.BOTH, expand=True)
         
+        # Close button, packed first so it keeps its space on short screens
+        close_button = ttk.Button(main_frame, text="Close", command=self.hide)
+        close_button.pack(side=tk.BOTTOM, pady=10)
+        
         # Title
         title_label = ttk.Label(main_frame, text="Test Results", font=("Arial", 20, "bold"))
         title_label.pack(pady=(0, 20))
@@ -59,28 +102,12 @@ class ResultsWindow:
         results_frame = ttk.LabelFrame(main_frame, text="Your Performance", padding="15")
         results_frame.pack(fill=tk.BOTH, expand=True, pady=10)
         
-        # WPM (main metric)
-        wpm_frame = ttk.Frame(results_frame)
-        wpm_frame.pack(fill=tk.X, pady=10)
-        ttk.Label(wpm_frame, text="Words Per Minute:", font=("Arial", 12)).pack(side=tk.LEFT)
-        wpm_value = ttk.Label(wpm_frame, text=f"{self.results['wpm']}", 
-                             font=("Arial", 16, "bold"), foreground="blue")
-        wpm_value.pack(side=tk.LEFT, padx=10)
-        
-        # Accuracy
-        accuracy_frame = ttk.Frame(results_frame)
-        accuracy_frame.pack(fill=tk.X, pady=10)
-        ttk.Label(accuracy_frame, text="Accuracy:", font=("Arial", 12)).pack(side=tk.LEFT)
-        accuracy_value = ttk.Label(accuracy_frame, text=f"{self.results['accuracy']}%", 
-                                   font=("Arial", 14, "bold"))
-        accuracy_value.pack(side=tk.LEFT, padx=10)
-        
-        # Time taken
-        time_frame = ttk.Frame(results_frame)
-        time_frame.pack(fill=tk.X, pady=10)
-        ttk.Label(time_frame, text="Time Taken:", font=("Arial", 12)).pack(side=tk.LEFT)
-        ttk.Label(time_frame, text=f"{self.results['time_taken']} seconds", 
-                 font=("Arial", 12)).pack(side=tk.LEFT, padx=10)
+        # Result values, updated by show()
+        self.values = {}
+        
+        # Main metrics
+        for field in self.SUMMARY_FIELDS:
+            self.add_value_row(results_frame, field, label_font=("Arial", 12), pady=10)
         
         # Separator
         separator = ttk.Separator(results_frame, orient=tk.HORIZONTAL)
@@ -91,44 +118,156 @@ class ResultsWindow:
                                  font=("Arial", 11, "bold"))
         details_label.pack(pady=(5, 10))
         
-        # Characters typed
-        chars_frame = ttk.Frame(results_frame)
-        chars_frame.pack(fill=tk.X, pady=5)
-        ttk.Label(chars_frame, text="Total Characters:", font=("Arial", 10)).pack(side=tk.LEFT)
-        ttk.Label(chars_frame, text=str(self.results['total_chars']), 
-                 font=("Arial", 10)).pack(side=tk.LEFT, padx=10)
-        
-        # Correct characters
-        correct_frame = ttk.Frame(results_frame)
-        correct_frame.pack(fill=tk.X, pady=5)
-        ttk.Label(correct_frame, text="Correct Characters:", font=("Arial", 10), 
-                 foreground="green").pack(side=tk.LEFT)
-        ttk.Label(correct_frame, text=str(self.results['correct_chars']), 
-                 font=("Arial", 10), foreground="green").pack(side=tk.LEFT, padx=10)
-        
-        # Incorrect characters
-        incorrect_frame = ttk.Frame(results_frame)
-        incorrect_frame.pack(fill=tk.X, pady=5)
-        ttk.Label(incorrect_frame, text="Incorrect Characters:", font=("Arial", 10), 
-                 foreground="red").pack(side=tk.LEFT)
-        ttk.Label(incorrect_frame, text=str(self.results['incorrect_chars']), 
-                 font=("Arial", 10), foreground="red").pack(side=tk.LEFT, padx=10)
-        
-        # Words completed
-        words_frame = ttk.Frame(results_frame)
-        words_frame.pack(fill=tk.X, pady=5)
-        ttk.Label(words_frame, text="Words Completed:", font=("Arial", 10)).pack(side=tk.LEFT)
-        ttk.Label(words_frame, text=str(self.results['words_completed']), 
-                 font=("Arial", 10)).pack(side=tk.LEFT, padx=10)
-        
-        # Test mode
-        mode_frame = ttk.Frame(results_frame)
-        mode_frame.pack(fill=tk.X, pady=5)
-        ttk.Label(mode_frame, text="Test Mode:", font=("Arial", 10)).pack(side=tk.LEFT)
-        mode_text = "Fixed Time" if self.results['test_mode'] == "fixed_time" else "Fixed Text"
-        ttk.Label(mode_frame, text=mode_text, font=("Arial", 10)).pack(side=tk.LEFT, padx=10)
-        
-        # Close button
-        close_button = ttk.Button(main_frame, text="Close", command=self.window.destroy)
-        close_button.pack(pady=10)
+        for field in self.DETAIL_FIELDS:
+            self.add_value_row(results_frame, field, label_font=("Arial", 10), pady=5)
+        
+        # Analysis sections, filled in by set_section as they are computed
+        analysis_frame = ttk.LabelFrame(main_frame, text="Analysis", padding="10")
+        analysis_frame.pack(fill=tk.X, pady=5)
+        self.section_labels = {}
+        for name, title in self.SECTION_TITLES:
+            section_frame = ttk.Frame(analysis_frame)
+            section_frame.pack(fill=tk.X, pady=2)
+            ttk.Label(section_frame, text=f"{title}:", font=("Arial", 10, "bold")).pack(side=tk.LEFT, anchor=tk.N)
+            label = ttk.Label(section_frame, text="", font=("Arial", 10),
+                              foreground="gray", wraplength=330, justify=tk.LEFT)
+            label.pack(side=tk.LEFT, padx=10)
+            self.section_labels[name] = label
+        
+        # Latency heatmap: one row of cells each for the slowest keys and bigrams
+        heatmap_frame = ttk.LabelFrame(main_frame, text="Slowest Keys (mean ms)", padding="10")
+        heatmap_frame.pack(fill=tk.X, pady=5)
+        self.heatmap_cells = {}
+        for row, (name, title) in enumerate((("keys", "Keys"), ("bigrams", "Bigrams"))):
+            ttk.Label(heatmap_frame, text=f"{title}:", font=("Arial", 9, "bold")).grid(
+                row=row, column=0, sticky=tk.W, padx=(0, 5))
+            cells = []
+            for column in range(self.HEATMAP_CELLS):
+                cell = tk.Label(heatmap_frame, text="", width=4, font=("Courier", 9),
+                                relief=tk.GROOVE, bg="#FFFFFF")
+                cell.grid(row=row, column=column + 1, padx=1, pady=1)
+                cells.append(cell)
+            self.heatmap_cells[name] = cells
+        
+    def add_value_row(self, parent, field, label_font, pady):
+        """Add a labelled result value backed by a StringVar"""
+        key, text, value_font, color, _ = field
+        row = ttk.Frame(parent)
+        row.pack(fill=tk.X, pady=pady)
+        options = {"foreground": color} if color else {}
+        ttk.Label(row, text=text, font=label_font, **options).pack(side=tk.LEFT)
+        self.values[key] = tk.StringVar()
+        ttk.Label(row, textvariable=self.values[key], font=value_font, **options).pack(
+            side=tk.LEFT, padx=10)
+        
+    def show(self, results):
+        """
+        Show the window with new results; analysis sections start as "Calculating..."
+        
+        Args:
+            results: TestResult of the completed test
+        """
+        self.results = results
+        for key, _, _, _, value_format in self.SUMMARY_FIELDS + self.DETAIL_FIELDS:
+            value = getattr(results, key)
+            if key == "test_mode":
+                value = self.MODE_NAMES.get(value, value)
+            self.values[key].set(value_format.format(value))
+        
+        for label in self.section_labels.values():
+            label.config(text="Calculating...", foreground="gray")
+        self.render_latency(None)
+        
+        # Make window modal
+        self.window.deiconify()
+        self.window.lift()
+        self.window.grab_set()
+        
+    def hide(self):
+        """Hide the window, keeping it for the next test"""
+        self.window.grab_release()
+        self.window.withdraw()
+        
+    def set_section(self, name, data):
+        """
+        Fill in an analysis section
+        
+        Args:
+            name: Section name from SECTION_TITLES
+            data: Section data, or None if the analysis failed
+        """
+        if name == "latency":
+            self.render_latency(data)
+            return
+        
+        label = self.section_labels.get(name)
+        if label is None:
+            return
+        
+        if data is None:
+            label.config(text="Not available", foreground="gray")
+            return
+        
+        formatter = getattr(self, f"format_{name}", None)
+        text = formatter(data) if formatter else str(data)
+        label.config(text=text, foreground="black")
+        
+    def render_latency(self, data):
+        """Fill the heatmap cells, shading each by its latency relative to the slowest"""
+        for name, cells in self.heatmap_cells.items():
+            entries = data.get(name, []) if data else []
+            slowest = entries[0][1] if entries else 0
+            for index, cell in enumerate(cells):
+                if index >= len(entries):
+                    cell.config(text="", bg="#FFFFFF")
+                    continue
+                text, mean_ms, count, error_rate = entries[index]
+                text = "?" if text is None else text.replace(" ", "\u2423")
+                cell.config(text=f"{text}\n{mean_ms:.0f}", bg=self.heat_color(mean_ms, slowest))
+        
+    @staticmethod
+    def heat_color(value, maximum):
+        """Blend from white (fast) to red (slowest)"""
+        ratio = value / maximum if maximum > 0 else 0
+        shade = int(255 - 155 * ratio)
+        return f"#FF{shade:02X}{shade:02X}"
+        
+    def format_keystrokes(self, data):
+        """Format the keystroke analysis section"""
+        return (f"{data['keystrokes']} keys typed, {data['corrections']} corrections, "
+                f"{data['typed_errors']} typing errors\n"
+                f"Keystroke accuracy: {data['keystroke_accuracy']}%")
+        
+    def format_speed(self, data):
+        """Format the speed-over-time section"""
+        if not data:
+            return "No keystrokes"
+        return "  ".join(f"{end:g}s: {wpm:g}" for end, wpm in data)
+        
+    def format_words(self, data):
+        """Format the word errors section as typed -> expected pairs"""
+        if not data["words"]:
+            return "No word errors"
+        pairs = []
+        for expected, typed, errors in data["words"]:
+            if typed is None:
+                pairs.append(f"skipped '{expected}'")
+            elif expected is None:
+                pairs.append(f"extra '{typed}'")
+            else:
+                pairs.append(f"'{typed}' for '{expected}'")
+        text = ", ".join(pairs)
+        if data["count"] > len(data["words"]):
+            text += f" (+{data['count'] - len(data['words'])} more)"
+        return text
+        
+    def format_history(self, data):
+        """Format the personal history section"""
+        best = data.get("personal_best")
+        if best is None:
+            return "First saved result"
+        text = f"Personal best: {round(best['wpm'], 1)} WPM"
+        if data.get("average") is not None:
+            text += f"\nRecent average: {round(data['average'], 1)} WPM"
+        return text
 
@@ -0,0 +1,346 @@
+"""
+Session Recorder Module
+Records the key events of a TypingTestApp test and replays them.
+
+Usage:
+    python session_recorder.py record session.tsk
+    python session_recorder.py replay session.tsk --speed 2
+
+Recording captures every <KeyPress> and <KeyRelease> on the input field
+during one test, with nanosecond timestamps, plus the sample text and test
+mode, into a compact binary file. Replay feeds the events back through
+event_generate at the original speed (or faster) and reports how long the
+key and timer handlers took, so a real trace becomes a repeatable
+performance test.
+
+File layout (little-endian):
+    header     magic "TSKR", version (H), reserved (H), event count (I),
+               metadata length (I)
+    metadata   UTF-8 JSON: sample_text, extension, test_mode, time_limit, keysyms
+    events     one 16-byte record per event: time since the first event in
+               ns (q), kind (B), pad, keysym table index (H), modifier state (I)
+"""
+
+import argparse
+import json
+import statistics
+import struct
+import sys
+import time
+from itertools import chain
+
+
+MAGIC = b"TSKR"
+VERSION = 1
+HEADER = struct.Struct("<4sHHII")
+RECORD = struct.Struct("<qBxHI")
+
+KEY_PRESS = 0
+KEY_RELEASE = 1
+EVENT_NAMES = {KEY_PRESS: "<KeyPress>", KEY_RELEASE: "<KeyRelease>"}
+
+# Handlers whose latency replay reports
+TIMED_HANDLERS = ("on_key_press", "on_key_release", "update_timer")
+
+# Bind tag placed in front of the input field's own tags, so recording sees
+# every key event however the app rebinds the field
+RECORDER_TAG = "SessionRecorder"
+
+
+class Recording:
+    """Key events of one test, with what is needed to replay them"""
+
+    def __init__(self, sample_text="", test_mode="fixed_text", time_limit=60):
+        self.sample_text = sample_text
+        self.extension = ""  # Text streamed onto the sample during the test
+        self.test_mode = test_mode
+        self.time_limit = time_limit
+        self.events = bytearray()
+        self.keysyms = []
+        self.keysym_index = {}
+
+    def __len__(self):
+        return len(self.events) // RECORD.size
+
+    def add(self, time_ns, kind, keysym, state):
+        """Append one event"""
+        index = self.keysym_index.get(keysym)
+        if index is None:
+            index = self.keysym_index[keysym] = len(self.keysyms)
+            self.keysyms.append(keysym)
+        self.events += RECORD.pack(time_ns, kind, index, state & 0xFFFFFFFF)
+
+    def iter_events(self):
+        """Yield (time_ns, kind, keysym, state) tuples"""
+        for time_ns, kind, index, state in RECORD.iter_unpack(self.events):
+            yield time_ns, kind, self.keysyms[index], state
+
+    def save(self, path):
+        """Write the recording to a file"""
+        metadata = json.dumps({
+            "sample_text": self.sample_text,
+            "extension": self.extension,
+            "test_mode": self.test_mode,
+            "time_limit": self.time_limit,
+            "keysyms": self.keysyms
+        }).encode("utf-8")
+        with open(path, "wb") as output:
+            output.write(HEADER.pack(MAGIC, VERSION, 0, len(self), len(metadata)))
+            output.write(metadata)
+            output.write(self.events)
+
+    @classmethod
+    def load(cls, path):
+        """Read a recording written by save"""
+        with open(path, "rb") as source:
+            data = source.read()
+        if len(data) < HEADER.size:
+            raise ValueError(f"{path} is not a session recording")
+        magic, version, _, count, metadata_length = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a session recording")
+        start = HEADER.size
+        metadata = json.loads(data[start:start + metadata_length].decode("utf-8"))
+        events = data[start + metadata_length:]
+        if len(events) != count * RECORD.size:
+            raise ValueError(f"{path} is truncated")
+
+        recording = cls(metadata["sample_text"], metadata["test_mode"], metadata["time_limit"])
+        recording.extension = metadata.get("extension", "")
+        recording.keysyms = metadata["keysyms"]
+        recording.keysym_index = {keysym: index for index, keysym in enumerate(recording.keysyms)}
+        recording.events = bytearray(events)
+        return recording
+
+
+class SessionRecorder:
+    """Records the key events of the next test run in a TypingTestApp"""
+
+    def __init__(self, app):
+        self.app = app
+        self.recording = None
+        self.first_ns = None
+        self.finished = False
+
+        field = app.input_field
+        field.bindtags((RECORDER_TAG,) + field.bindtags())
+        field.bind_class(RECORDER_TAG, "<KeyPress>", lambda event: self.on_event(KEY_PRESS, event))
+        field.bind_class(RECORDER_TAG, "<KeyRelease>", lambda event: self.on_event(KEY_RELEASE, event))
+
+    def on_event(self, kind, event):
+        """Record a key event that arrives while the test runs"""
+        now_ns = time.perf_counter_ns()
+        controller = self.app.test_controller
+        if self.finished:
+            return
+        if self.recording is None:
+            if kind != KEY_PRESS or not controller.is_running():
+                return
+            # The first key press of the test: the sample has not been extended yet
+            self.recording = Recording(controller.sample_text, controller.test_mode,
+                                       controller.time_limit)
+            self.first_ns = now_ns
+        elif controller.is_completed():
+            self.finish()
+            return
+        self.recording.add(now_ns - self.first_ns, kind, event.keysym, event.state)
+
+    def finish(self):
+        """Stop recording; returns the Recording, or None if no test was typed"""
+        if self.recording is not None and not self.finished:
+            sample_text = self.app.test_controller.sample_text
+            self.recording.extension = sample_text[len(self.recording.sample_text):]
+        self.finished = True
+        return self.recording
+
+
+def time_handlers(app, names=TIMED_HANDLERS):
+    """
+    Wrap app handlers to measure how long each call takes
+
+    Must be called before the test starts, since the app binds its
+    handlers when a test starts.
+
+    Returns:
+        dict: Handler name -> list of call durations in nanoseconds
+    """
+    timings = {}
+    for name in names:
+        handler = getattr(app, name)
+        durations = timings[name] = []
+
+        def timed(*args, handler=handler, durations=durations):
+            start = time.perf_counter_ns()
+            try:
+                return handler(*args)
+            finally:
+                durations.append(time.perf_counter_ns() - start)
+
+        setattr(app, name, timed)
+    return timings
+
+
+class Replayer:
+    """Feeds a Recording back into a TypingTestApp through event_generate"""
+
+    def __init__(self, app, recording, speed=1.0, on_done=None):
+        """
+        Args:
+            app: TypingTestApp with its UI built
+            recording: Recording to replay
+            speed: Playback speed multiplier; 0 replays as fast as possible
+            on_done: Called with the report dictionary when replay finishes
+        """
+        self.app = app
+        self.recording = recording
+        self.speed = speed
+        self.on_done = on_done
+        self.events = list(recording.iter_events())
+        self.next_event = 0
+        self.start_ns = None
+        self.timings = time_handlers(app)
+        self.lag = []  # Nanoseconds between each event's due time and its dispatch
+
+    def start(self):
+        """Set up the recorded test and begin dispatching events"""
+        app = self.app
+        app.test_mode.set(self.recording.test_mode)
+        app.show_sample_text(self.recording.sample_text)
+        app.start_test(time_limit=self.recording.time_limit)
+        if self.recording.extension and app.text_stream is not None:
+            # Stream the recorded text first, so the sample matches the original session
+            app.text_stream = chain([self.recording.extension], app.text_stream)
+        app.input_field.focus_force()
+        self.start_ns = time.perf_counter_ns()
+        self.dispatch()
+
+    def due_ns(self, index):
+        """Time since start at which an event is due"""
+        if self.speed <= 0:
+            return 0
+        return round(self.events[index][0] / self.speed)
+
+    def dispatch(self):
+        """Send every event that is due, then wait for the next one"""
+        app = self.app
+        while self.next_event < len(self.events):
+            due = self.due_ns(self.next_event)
+            elapsed = time.perf_counter_ns() - self.start_ns
+            if due > elapsed:
+                app.root.after(max(1, (due - elapsed) // 1_000_000), self.dispatch)
+                return
+            _, kind, keysym, state = self.events[self.next_event]
+            self.lag.append(elapsed - due)
+            app.input_field.event_generate(EVENT_NAMES[kind], keysym=keysym, state=state, when="tail")
+            self.next_event += 1
+            if self.speed <= 0:
+                # Let the handlers run before the next event, as when typing
+                app.root.after_idle(self.dispatch)
+                return
+        app.root.after_idle(self.finish)
+
+    def finish(self):
+        """End the test if the recording did not, and report"""
+        if self.app.test_controller.is_running():
+            self.app.end_test()
+        report = self.report()
+        if self.on_done is not None:
+            self.on_done(report)
+
+    def report(self):
+        """
+        Summarize handler latency
+
+        Returns:
+            dict: Name -> {"count", "p50_ms", "p99_ms", "max_ms"} for each timed
+                handler and for "dispatch_lag"
+        """
+        summary = {name: summarize(durations) for name, durations in self.timings.items()}
+        summary["dispatch_lag"] = summarize(self.lag)
+        return summary
+
+
+def summarize(durations):
+    """Count, median, 99th percentile and maximum of nanosecond durations, in ms"""
+    if not durations:
+        return {"count": 0, "p50_ms": 0, "p99_ms": 0, "max_ms": 0}
+    ordered = sorted(durations)
+    p99 = ordered[min(len(ordered) - 1, round(0.99 * (len(ordered) - 1)))]
+    return {
+        "count": len(ordered),
+        "p50_ms": round(statistics.median(ordered) / 1e6, 3),
+        "p99_ms": round(p99 / 1e6, 3),
+        "max_ms": round(ordered[-1] / 1e6, 3)
+    }
+
+
+def record(path):
+    """Run the app and record its first test to path"""
+    import tkinter as tk
+    from typing_test_app import TypingTestApp
+
+    root = tk.Tk()
+    app = TypingTestApp(root)
+    recorder = SessionRecorder(app)
+    root.mainloop()
+
+    recording = recorder.finish()
+    if recording is None or len(recording) == 0:
+        print("No test was typed; nothing recorded", file=sys.stderr)
+        return 1
+    recording.save(path)
+    print(f"Recorded {len(recording)} events to {path}", file=sys.stderr)
+    return 0
+
+
+def replay(path, speed=1.0):
+    """Replay a recording in a new app window and print the handler latency report"""
+    import tkinter as tk
+    from typing_test_app import TypingTestApp
+
+    recording = Recording.load(path)
+    root = tk.Tk()
+    app = TypingTestApp(root)
+    result = {}
+
+    def done(report):
+        result.update(report)
+        app.on_close()
+
+    replayer = Replayer(app, recording, speed, on_done=done)
+
+    def start_when_ready():
+        # The app loads its first passage and results modules after the first paint
+        if app.results_pipeline is None:
+            root.after(10, start_when_ready)
+        else:
+            replayer.start()
+
+    root.after_idle(start_when_ready)
+    root.mainloop()
+
+    print(f"Replayed {len(recording)} events at speed {speed:g}")
+    for name, stats in result.items():
+        print(f"{name:16s} {stats['count']:7d} calls  p50 {stats['p50_ms']:8.3f} ms  "
+              f"p99 {stats['p99_ms']:8.3f} ms  max {stats['max_ms']:8.3f} ms")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Record and replay typing test key events")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    record_parser = subparsers.add_parser("record", help="Run the app and record one test")
+    record_parser.add_argument("path", help="Recording file to write")
+    replay_parser = subparsers.add_parser("replay", help="Replay a recording and report latency")
+    replay_parser.add_argument("path", help="Recording file to read")
+    replay_parser.add_argument("--speed", type=float, default=1.0,
+                               help="Playback speed multiplier (0 = as fast as possible)")
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        sys.exit(record(args.path))
+    sys.exit(replay(args.path, args.speed))
+
+
+if __name__ == "__main__":
+    main()
@@ -3,16 +3,76 @@ Test Controller Module
 Manages test state, timing, and calculations for the typing speed test.
 """
 
-import time
+from char_matcher import CharMatcher, find_edit
+from clock import MonotonicClock, NS_PER_SECOND
+from key_latency import KeyLatencyStats
+from keystroke_log import KeystrokeLog
+from live_metrics import LiveMetrics, word_count_delta
+from word_alignment import WordAligner, align_words, positional_word_errors
+
+
+class TestResult:
+    """Final results of a test; converted to a dictionary only for JSON and the database"""
+    
+    __slots__ = ("wpm", "accuracy", "time_taken", "total_chars", "correct_chars",
+                 "incorrect_chars", "words_completed", "word_errors", "test_mode")
+    
+    def __init__(self, wpm, accuracy, time_taken, total_chars, correct_chars,
+                 incorrect_chars, words_completed, word_errors, test_mode):
+        self.wpm = wpm
+        self.accuracy = accuracy
+        self.time_taken = time_taken
+        self.total_chars = total_chars
+        self.correct_chars = correct_chars
+        self.incorrect_chars = incorrect_chars
+        self.words_completed = words_completed
+        self.word_errors = word_errors
+        self.test_mode = test_mode
+        
+    def to_dict(self):
+        """Convert to the dictionary returned by TestController.get_results"""
+        return {field: getattr(self, field) for field in self.__slots__}
 
 
 class TestController:
     """Manages the state and calculations for typing tests"""
     
-    def __init__(self):
+    # Fixed attributes keep the many sessions held by servers and batch
+    # scoring small; sample_text and user_input are the same string objects
+    # the char matcher holds, not copies
+    __slots__ = ("clock", "track_key_stats", "track_keystrokes", "scoring", "word_aligner", "test_state", "test_mode", "start_ns",
+                 "pause_intervals", "paused_ns", "elapsed_time", "time_limit",
+                 "total_chars", "correct_chars", "incorrect_chars", "user_input",
+                 "sample_text", "current_position", "char_matcher", "changed_range",
+                 "keystroke_log", "live_metrics", "word_count", "key_stats",
+                 "last_key_ns", "final_wpm", "final_accuracy", "words_completed",
+                 "word_errors")
+    
+    def __init__(self, clock=None, track_key_stats=True, scoring="position",
+                 track_keystrokes=True, rolling_windows=(5, 15)):
+        """
+        Args:
+            clock: Object with a now_ns() method (MonotonicClock by default,
+                FakeClock for deterministic tests)
+            track_key_stats: If True, collect per-key and per-bigram latency
+            track_keystrokes: If True, keep a KeystrokeLog of every event for
+                results analysis; its size grows with the test
+            rolling_windows: Window lengths in seconds get_rolling_wpm supports;
+                empty to keep no keystroke ring at all (raw and net WPM still work)
+            scoring: "position" compares characters position by position;
+                "word" aligns typed words with sample words, so a skipped or
+                extra character costs one error (applies from the next start_test)
+        """
+        self.clock = clock if clock is not None else MonotonicClock()
+        self.track_key_stats = track_key_stats
+        self.track_keystrokes = track_keystrokes
+        self.scoring = scoring
+        self.word_aligner = None
         self.test_state = "idle"  # idle, running, paused, completed
         self.test_mode = "fixed_time"  # fixed_time or fixed_text
-        self.start_time = None
+        self.start_ns = None
+        self.pause_intervals = []  # [pause_ns, resume_ns] pairs; resume_ns is None while paused
+        self.paused_ns = 0  # Total nanoseconds of completed pauses
         self.elapsed_time = 0
         self.time_limit = 60  # seconds for fixed_time mode
         
@@ -23,11 +83,19 @@ class TestController:
         self.user_input = ""
         self.sample_text = ""
         self.current_position = 0
+        self.char_matcher = CharMatcher()
+        self.changed_range = (0, 0, 0)
+        self.keystroke_log = KeystrokeLog() if track_keystrokes else None
+        self.live_metrics = LiveMetrics(windows=rolling_windows)
+        self.word_count = 0
+        self.key_stats = None
+        self.last_key_ns = None  # Elapsed time of the previous typed character
         
         # Results
         self.final_wpm = 0
         self.final_accuracy = 0
         self.words_completed = 0
+        self.word_errors = 0
         
     def start_test(self, mode="fixed_time", time_limit=60, sample_text=""):
         """Start a new typing test"""
@@ -35,86 +103,210 @@ class TestController:
         self.test_mode = mode
         self.time_limit = time_limit
         self.sample_text = sample_text
-        self.start_time = time.time()
+        self.start_ns = self.clock.now_ns()
+        self.pause_intervals = []
+        self.paused_ns = 0
         self.elapsed_time = 0
         self.total_chars = 0
         self.correct_chars = 0
         self.incorrect_chars = 0
         self.user_input = ""
         self.current_position = 0
+        self.char_matcher.reset(sample_text)
+        self.changed_range = (0, 0, 0)
+        self.keystroke_log = KeystrokeLog() if self.track_keystrokes else None
+        self.live_metrics.reset()
+        self.word_count = 0
+        self.key_stats = KeyLatencyStats() if self.track_key_stats else None
+        self.last_key_ns = None
+        self.word_aligner = WordAligner(sample_text) if self.scoring == "word" else None
         self.final_wpm = 0
         self.final_accuracy = 0
         self.words_completed = 0
+        self.word_errors = 0
         
     def pause_test(self):
         """Pause the current test"""
         if self.test_state == "running":
             self.test_state = "paused"
             # Calculate elapsed time up to pause
-            if self.start_time:
-                self.elapsed_time = time.time() - self.start_time
+            now_ns = self.clock.now_ns()
+            self.elapsed_time = self._elapsed_ns(now_ns) / NS_PER_SECOND
+            self.pause_intervals.append([now_ns, None])
                 
     def resume_test(self):
         """Resume a paused test"""
         if self.test_state == "paused":
             self.test_state = "running"
-            # Adjust start time to account for paused duration
-            if self.start_time:
-                self.start_time = time.time() - self.elapsed_time
+            # Close the pause interval so it is excluded from elapsed time
+            interval = self.pause_intervals[-1]
+            interval[1] = self.clock.now_ns()
+            self.paused_ns += interval[1] - interval[0]
                 
     def stop_test(self):
         """Stop the current test"""
         if self.test_state in ["running", "paused"]:
+            self.elapsed_time = self.get_elapsed_time()
             self.test_state = "completed"
-            if self.start_time:
-                self.elapsed_time = time.time() - self.start_time
+            # A fixed-time test lasts exactly its time limit, however late it is stopped
+            if self.test_mode == "fixed_time":
+                self.elapsed_time = min(self.elapsed_time, self.time_limit)
             self.calculate_final_results()
             
     def reset_test(self):
         """Reset the test to initial state"""
         self.test_state = "idle"
-        self.start_time = None
+        self.start_ns = None
+        self.pause_intervals = []
+        self.paused_ns = 0
         self.elapsed_time = 0
         self.total_chars = 0
         self.correct_chars = 0
         self.incorrect_chars = 0
         self.user_input = ""
         self.current_position = 0
+        self.char_matcher.reset(self.sample_text)
+        self.changed_range = (0, 0, 0)
+        self.keystroke_log = KeystrokeLog() if self.track_keystrokes else None
+        self.live_metrics.reset()
+        self.word_count = 0
+        self.key_stats = None
+        self.last_key_ns = None
+        if self.word_aligner is not None:
+            self.word_aligner.reset(self.sample_text)
         self.final_wpm = 0
         self.final_accuracy = 0
         self.words_completed = 0
+        self.word_errors = 0
         
     def update_input(self, user_input):
         """Update user input and recalculate metrics"""
         if self.test_state != "running":
             return
-            
-        self.user_input = user_input
-        self.current_position = len(user_input)
-        self.total_chars = len(user_input)
         
-        # Count correct and incorrect characters
-        self.correct_chars = 0
-        self.incorrect_chars = 0
+        position, removed, inserted = find_edit(self.user_input, user_input)
+        return self.apply_edit(position, removed, inserted)
         
-        for i in range(min(len(user_input), len(self.sample_text))):
-            if user_input[i] == self.sample_text[i]:
-                self.correct_chars += 1
-            else:
-                self.incorrect_chars += 1
+    def apply_edit(self, position, removed, inserted):
+        """
+        Apply a single edit to the user input and update metrics
+        
+        Only the edited region is rescored, so typing or deleting at the
+        end of the input costs the same regardless of its length.
+        
+        Args:
+            position: Index where the edit starts
+            removed: Number of characters removed at position
+            inserted: Text inserted at position
+        
+        Returns:
+            bool: True if the test completed
+        """
+        if self.test_state != "running":
+            return
+        
+        elapsed_ns = self.get_elapsed_ns()
+        old_input = self.user_input
+        
+        # Log the edit before applying it, while the removed text is still known
+        if self.keystroke_log is not None:
+            self.keystroke_log.record_edit(elapsed_ns, position,
+                                           old_input[position:position + removed],
+                                           inserted, self.sample_text)
+        if inserted:
+            self.live_metrics.record(elapsed_ns, len(inserted))
+            self._record_key_latency(elapsed_ns, old_input, position, removed, inserted)
+        self.changed_range = self.char_matcher.apply_edit(position, removed, inserted)
+        
+        self.user_input = self.char_matcher.typed
+        self.word_count += word_count_delta(old_input, self.user_input, position,
+                                            removed, len(inserted))
+        self.current_position = len(self.user_input)
+        self.total_chars = len(self.user_input)
+        if self.word_aligner is not None:
+            self.word_aligner.update(self.user_input, position)
+        self._update_char_counts()
         
         # Check if test should end (fixed_text mode)
         if self.test_mode == "fixed_text":
-            if self.current_position >= len(self.sample_text):
+            # Word scoring also finishes once the last sample word is typed, even
+            # if skipped characters left the input shorter than the sample
+            if (self.current_position >= len(self.sample_text) or
+                    (self.word_aligner is not None and self.word_aligner.is_complete())):
                 self.stop_test()
                 return True  # Test completed
         
         return False  # Test still running
         
+    def _record_key_latency(self, elapsed_ns, old_input, position, removed, inserted):
+        """Record inter-key latency for a single character typed at the end"""
+        previous_ns = self.last_key_ns
+        self.last_key_ns = elapsed_ns
+        
+        # Pastes and mid-text edits are not keystrokes in a typing sequence
+        if (self.key_stats is None or previous_ns is None or removed or len(inserted) != 1
+                or position != len(old_input) or position >= len(self.sample_text)):
+            return
+        
+        expected = self.sample_text[position]
+        previous = self.sample_text[position - 1] if position > 0 else None
+        self.key_stats.record(expected, previous, elapsed_ns - previous_ns, inserted == expected)
+        
+    def extend_sample_text(self, text):
+        """
+        Append text to the sample while a test is running
+        
+        Used by fixed-time tests that stream more text as the typist
+        approaches the end of the passage.
+        
+        Args:
+            text: Text to append to the sample
+        """
+        self.changed_range = self.char_matcher.extend_sample(text)
+        self.sample_text = self.char_matcher.sample_text
+        if self.word_aligner is not None:
+            self.word_aligner.extend_sample(text)
+        self._update_char_counts()
+        
+    def _update_char_counts(self):
+        """Take correct and incorrect character counts from the active scoring"""
+        if self.word_aligner is not None:
+            self.incorrect_chars = self.word_aligner.incorrect_chars
+            self.correct_chars = max(0, self.total_chars - self.incorrect_chars)
+        else:
+            self.correct_chars = self.char_matcher.correct_chars
+            self.incorrect_chars = self.char_matcher.incorrect_chars
+        
+    def get_remaining_sample_length(self):
+        """Get the number of sample characters not yet typed"""
+        return max(0, len(self.sample_text) - self.current_position)
+        
+    def _elapsed_ns(self, now_ns):
+        """Nanoseconds since the test started, excluding completed pauses"""
+        return now_ns - self.start_ns - self.paused_ns
+        
+    def get_elapsed_ns(self):
+        """Get the elapsed test time in integer nanoseconds, excluding pauses"""
+        if self.test_state == "running" and self.start_ns is not None:
+            return self._elapsed_ns(self.clock.now_ns())
+        return round(self.elapsed_time * NS_PER_SECOND)
+        
+    def get_elapsed_time(self):
+        """Get the elapsed test time in seconds, excluding pauses"""
+        if self.test_state == "running" and self.start_ns is not None:
+            return self._elapsed_ns(self.clock.now_ns()) / NS_PER_SECOND
+        return self.elapsed_time
+        
+    def get_remaining_time(self):
+        """Get the seconds left before the time limit (fixed_time mode), or None"""
+        if self.test_mode != "fixed_time":
+            return None
+        return max(0, self.time_limit - self.get_elapsed_time())
+        
     def update_time(self):
         """Update elapsed time and check if time limit reached"""
-        if self.test_state == "running" and self.start_time:
-            self.elapsed_time = time.time() - self.start_time
+        if self.test_state == "running" and self.start_ns is not None:
+            self.elapsed_time = self.get_elapsed_time()
             
             # Check if time limit reached (fixed_time mode)
             if self.test_mode == "fixed_time":
@@ -126,12 +318,29 @@ class TestController:
         
     def get_current_wpm(self):
         """Calculate current WPM"""
-        if self.elapsed_time > 0:
+        elapsed_time = self.get_elapsed_time()
+        if elapsed_time > 0:
             # WPM = (characters / 5) / (time in minutes)
-            wpm = (self.total_chars / 5) / (self.elapsed_time / 60)
+            wpm = (self.total_chars / 5) / (elapsed_time / 60)
             return max(0, wpm)  # Ensure non-negative
         return 0
         
+    def get_rolling_wpm(self, window=5):
+        """Calculate WPM over the last window seconds (5 or 15)"""
+        return self.live_metrics.rolling_wpm(window, self.get_elapsed_ns())
+        
+    def get_raw_wpm(self):
+        """Calculate raw WPM, counting every typed character including corrected ones"""
+        return self.live_metrics.raw_wpm(self.get_elapsed_ns())
+        
+    def get_net_wpm(self):
+        """Calculate net WPM: gross WPM minus uncorrected errors per minute"""
+        elapsed_time = self.get_elapsed_time()
+        if elapsed_time > 0:
+            wpm = (self.total_chars / 5 - self.incorrect_chars) / (elapsed_time / 60)
+            return max(0, wpm)
+        return 0
+        
     def get_current_accuracy(self):
         """Calculate current accuracy percentage"""
         if self.total_chars > 0:
@@ -148,31 +357,47 @@ class TestController:
         
     def get_words_completed(self):
         """Count words completed"""
-        if not self.user_input:
-            return 0
-        
-        # Count words by splitting on whitespace
-        words = self.user_input.split()
-        return len(words)
+        # Whitespace-separated words, kept up to date by apply_edit
+        return self.word_count
         
     def calculate_final_results(self):
         """Calculate final test results"""
         self.final_wpm = self.get_current_wpm()
         self.final_accuracy = self.get_current_accuracy()
         self.words_completed = self.get_words_completed()
+        if self.word_aligner is not None:
+            self.word_errors = self.word_aligner.incorrect_words
+        else:
+            self.word_errors = positional_word_errors(self.user_input, self.sample_text)
+        
+    def get_word_details(self):
+        """
+        Get the mistyped, skipped and extra words of the test
+        
+        Returns:
+            list: (sample word or None, typed word or None, character errors) tuples
+        """
+        if self.word_aligner is not None:
+            return self.word_aligner.word_details()
+        return align_words(self.user_input, self.sample_text).word_details()
+        
+    def get_result_record(self):
+        """Get final test results as a compact TestResult"""
+        return TestResult(
+            wpm=round(self.final_wpm, 1),
+            accuracy=round(self.final_accuracy, 1),
+            time_taken=round(self.elapsed_time, 2),
+            total_chars=self.total_chars,
+            correct_chars=self.correct_chars,
+            incorrect_chars=self.incorrect_chars,
+            words_completed=self.words_completed,
+            word_errors=self.word_errors,
+            test_mode=self.test_mode
+        )
         
     def get_results(self):
-        """Get final test results as a dictionary"""
-        return {
-            "wpm": round(self.final_wpm, 1),
-            "accuracy": round(self.final_accuracy, 1),
-            "time_taken": round(self.elapsed_time, 2),
-            "total_chars": self.total_chars,
-            "correct_chars": self.correct_chars,
-            "incorrect_chars": self.incorrect_chars,
-            "words_completed": self.words_completed,
-            "test_mode": self.test_mode
-        }
+        """Get final test results as a dictionary (for JSON responses and storage)"""
+        return self.get_result_record().to_dict()
         
     def is_running(self):
         """Check if test is currently running"""
@@ -0,0 +1,49 @@
+"""
+Character Compare Tests
+Batch comparison against a long sample with short inputs.
+"""
+
+import unittest
+
+import char_compare
+from char_compare import batch_compare, count_matches, match_mask
+
+
+class BatchCompareTest(unittest.TestCase):
+
+    def setUp(self):
+        # A book-length sample; the inputs only reach its first few hundred characters
+        self.sample = "the quick brown fox jumps over the lazy dog " * 50_000
+        self.inputs = [
+            "",
+            "the quick brown fox",
+            "teh quikc brown fox jumps",
+            self.sample[:300].upper(),
+            "the quick brown fox\0\0\0",  # NUL never matches padding
+        ]
+
+    def test_counts_match_per_input_comparison(self):
+        expected = [count_matches(typed, self.sample) for typed in self.inputs]
+        self.assertEqual(batch_compare(self.sample, self.inputs), expected)
+
+    def test_masks_mark_incorrect_positions(self):
+        for typed, (correct, incorrect, mask) in zip(
+                self.inputs, batch_compare(self.sample, self.inputs, with_masks=True)):
+            expected = bytes(1 - value for value in match_mask(typed, self.sample))
+            self.assertEqual(mask, expected)
+            self.assertEqual((correct, incorrect), count_matches(typed, self.sample))
+
+    def test_inputs_longer_than_sample(self):
+        inputs = ["abcdef", "abx", "a"]
+        self.assertEqual(batch_compare("abc", inputs), [(3, 0), (2, 1), (1, 0)])
+
+    @unittest.skipUnless(char_compare.has_numpy(), "NumPy is not installed")
+    def test_matrix_width_follows_inputs(self):
+        # Fails with MemoryError if the matrix were sized by the sample
+        sample = "x" * 50_000_000
+        results = batch_compare(sample, ["xxxx"] * 1000)
+        self.assertEqual(results, [(4, 0)] * 1000)
+
+
+if __name__ == "__main__":
+    unittest.main()
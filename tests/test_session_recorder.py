@@ -0,0 +1,136 @@
+"""
+Session Recorder Tests
+Replay of recordings through a stand-in for TypingTestApp (no display needed).
+"""
+
+import os
+import tempfile
+import unittest
+from collections import deque
+
+from clock import FakeClock
+from session_recorder import KEY_PRESS, KEY_RELEASE, Recording, Replayer
+import test_controller
+
+
+class FakeVariable:
+    def __init__(self, value):
+        self.value = value
+
+    def set(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+class FakeRoot:
+    """Runs after/after_idle callbacks from a queue, in order"""
+
+    def __init__(self):
+        self.callbacks = deque()
+
+    def after(self, delay_ms, callback):
+        self.callbacks.append(callback)
+
+    def after_idle(self, callback):
+        self.callbacks.append(callback)
+
+    def run(self):
+        while self.callbacks:
+            self.callbacks.popleft()()
+
+
+class FakeInputField:
+    """Delivers generated key presses to the app"""
+
+    def __init__(self, app):
+        self.app = app
+
+    def focus_force(self):
+        pass
+
+    def event_generate(self, name, keysym, state, when):
+        if name == "<KeyPress>":
+            self.app.on_key_press(keysym)
+
+
+class FakeApp:
+    """The parts of TypingTestApp a Replayer drives, over a real TestController"""
+
+    def __init__(self):
+        self.clock = FakeClock()
+        self.test_controller = test_controller.TestController(clock=self.clock)
+        self.test_mode = FakeVariable("fixed_text")
+        self.root = FakeRoot()
+        self.input_field = FakeInputField(self)
+        self.sample_text = ""
+        self.text_stream = None
+
+    def show_sample_text(self, text):
+        self.sample_text = text
+
+    def start_test(self, time_limit=None):
+        self.test_controller.start_test(mode=self.test_mode.get(),
+                                        time_limit=60 if time_limit is None else time_limit,
+                                        sample_text=self.sample_text)
+
+    def end_test(self):
+        self.test_controller.stop_test()
+
+    def on_key_press(self, keysym):
+        # Each key press comes one second after the previous one
+        self.clock.advance(seconds=1)
+        controller = self.test_controller
+        if controller.update_time() or not controller.is_running():
+            return
+        controller.update_input(controller.user_input + keysym)
+
+    def on_key_release(self, keysym):
+        pass
+
+    def update_timer(self):
+        pass
+
+
+def make_recording(time_limit, keys=15):
+    """A fixed_time recording typing one key per second"""
+    recording = Recording("abcdefghijklmnopqrstuvwxyz", "fixed_time", time_limit)
+    for index in range(keys):
+        keysym = recording.sample_text[index]
+        recording.add(index * 1_000_000_000, KEY_PRESS, keysym, 0)
+        recording.add(index * 1_000_000_000 + 50_000_000, KEY_RELEASE, keysym, 0)
+    return recording
+
+
+def replay(recording):
+    """Replay a recording as fast as possible and return the app"""
+    app = FakeApp()
+    Replayer(app, recording, speed=0).start()
+    app.root.run()
+    return app
+
+
+class ReplayTimeLimitTest(unittest.TestCase):
+
+    def test_replay_uses_recorded_time_limit(self):
+        app = replay(make_recording(time_limit=10))
+        controller = app.test_controller
+        self.assertEqual(controller.time_limit, 10)
+        self.assertTrue(controller.is_completed())
+        results = controller.get_results()
+        self.assertEqual(results["time_taken"], 10)
+        self.assertEqual(results["total_chars"], 9)  # The tenth key arrives at the limit
+
+    def test_time_limit_survives_save_and_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "session.tsk")
+            make_recording(time_limit=30).save(path)
+            recording = Recording.load(path)
+        self.assertEqual(recording.time_limit, 30)
+        self.assertEqual(len(recording), 30)
+        self.assertEqual(replay(recording).test_controller.time_limit, 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -4,6 +4,11 @@ Provides sample text passages for typing tests with different difficulty levels.
 """
 
 import random
+from bisect import bisect_left, bisect_right
+
+from adaptive_selection import NgramIndex
+from passage_corpus import PassageCorpus
+from text_stream import MarkovTextModel, stream_text
 
 
 class TextGenerator:
@@ -123,6 +128,67 @@ class TextGenerator:
         "of powers, checks and balances, and enumerated rights that limit governmental authority."
     ]
     
+    # Optional indexed on-disk corpus (see load_corpus)
+    _corpus = None
+    
+    # Built-in passages sorted by length, built on first use
+    _texts_by_length = None
+    _sorted_lengths = None
+    
+    # Markov models for streamed text, built per difficulty on first use
+    _stream_models = {}
+    
+    # Number of corpus passages sampled to build a stream model
+    STREAM_MODEL_PASSAGES = 200
+    
+    # N-gram index for adaptive selection over the built-in passages, built on first use
+    _ngram_index = None
+    _index_sections = None  # difficulty -> (start, end) passage id range
+    
+    # Passage ids scored per adaptive selection, so a large corpus costs the same as a small one
+    ADAPTIVE_WINDOW = 5000
+    
+    @classmethod
+    def load_corpus(cls, path):
+        """
+        Serve passages from an indexed corpus file instead of the built-in lists
+        
+        Args:
+            path: Corpus file written by passage_corpus.build_corpus
+        """
+        cls.use_corpus(PassageCorpus(path))
+    
+    @staticmethod
+    def open_corpus(path):
+        """
+        Open and index a corpus file without installing it
+        
+        Safe to call from a worker thread; pass the result to use_corpus.
+        
+        Returns:
+            PassageCorpus: Opened corpus
+        """
+        corpus = PassageCorpus(path)
+        len(corpus)  # Maps the file and reads its index
+        return corpus
+    
+    @classmethod
+    def use_corpus(cls, corpus):
+        """Serve passages from an opened PassageCorpus"""
+        if cls._corpus is not None:
+            cls._corpus.close()
+        cls._corpus = corpus
+        cls._stream_models = {}
+    
+    @classmethod
+    def _length_index(cls):
+        """Get the built-in passages sorted by length, with their lengths"""
+        if cls._texts_by_length is None:
+            texts = sorted(cls.EASY_TEXTS + cls.MEDIUM_TEXTS + cls.HARD_TEXTS, key=len)
+            cls._sorted_lengths = [len(text) for text in texts]
+            cls._texts_by_length = texts
+        return cls._texts_by_length, cls._sorted_lengths
+    
     @classmethod
     def get_text(cls, difficulty="medium", random_selection=True):
         """
@@ -135,6 +201,11 @@ class TextGenerator:
         Returns:
             str: Sample text for typing practice
         """
+        if cls._corpus is not None:
+            if random_selection:
+                return cls._corpus.random_passage(difficulty)
+            return cls._corpus.first_passage(difficulty)
+        
         if difficulty.lower() == "easy":
             texts = cls.EASY_TEXTS
         elif difficulty.lower() == "hard":
@@ -147,11 +218,102 @@ class TextGenerator:
         else:
             return texts[0]
     
+    @classmethod
+    def _adaptive_index(cls):
+        """
+        Get the n-gram index over every passage, with difficulty id ranges
+        
+        A corpus's index is stored in its file (or built by
+        PassageCorpus.ngram_index(build=True) on a worker thread for older
+        files); it is never built here.
+        
+        Returns:
+            tuple: (NgramIndex or None if the corpus has none yet, sections)
+        """
+        if cls._corpus is not None:
+            corpus = cls._corpus
+            sections = {difficulty: corpus.index_range(difficulty)
+                        for difficulty in ("easy", "medium", "hard")}
+            return corpus.ngram_index(), sections
+        
+        if cls._ngram_index is None:
+            passages = cls.EASY_TEXTS + cls.MEDIUM_TEXTS + cls.HARD_TEXTS
+            easy_end = len(cls.EASY_TEXTS)
+            medium_end = easy_end + len(cls.MEDIUM_TEXTS)
+            cls._index_sections = {"easy": (0, easy_end), "medium": (easy_end, medium_end),
+                                   "hard": (medium_end, len(passages))}
+            cls._ngram_index = NgramIndex(passages)
+        return cls._ngram_index, cls._index_sections
+    
+    @classmethod
+    def get_adaptive_text(cls, difficulty="medium", weakness=None):
+        """
+        Get a sample text that exercises the typist's weak keys
+        
+        Args:
+            difficulty: "easy", "medium", or "hard"
+            weakness: Profile from adaptive_selection.weakness_from_stats
+        
+        Returns:
+            str: Sample text for typing practice (a random text if the
+                profile is empty or matches nothing)
+        """
+        if not weakness:
+            return cls.get_text(difficulty)
+        
+        index, sections = cls._adaptive_index()
+        if index is None:
+            return cls.get_text(difficulty)
+        start, end = sections.get(difficulty.lower(), sections["medium"])
+        passage_id = index.choose(weakness, start, end, window=cls.ADAPTIVE_WINDOW)
+        if passage_id is None:
+            return cls.get_text(difficulty)
+        
+        if cls._corpus is not None:
+            return cls._corpus.get_passage(passage_id)
+        return (cls.EASY_TEXTS + cls.MEDIUM_TEXTS + cls.HARD_TEXTS)[passage_id]
+    
+    @classmethod
+    def get_text_stream(cls, difficulty="medium", seed=None, chunk_words=20):
+        """
+        Get an endless stream of generated text for a difficulty
+        
+        Args:
+            difficulty: "easy", "medium", or "hard"
+            seed: Seed for a repeatable stream, or None
+            chunk_words: Number of words per chunk
+        
+        Returns:
+            generator: Yields text chunks, each starting with a space
+        """
+        difficulty = difficulty.lower()
+        if difficulty not in ("easy", "hard"):
+            difficulty = "medium"
+        
+        model = cls._stream_models.get(difficulty)
+        if model is None:
+            if cls._corpus is not None:
+                passages = [cls._corpus.random_passage(difficulty)
+                            for _ in range(cls.STREAM_MODEL_PASSAGES)]
+            elif difficulty == "easy":
+                passages = cls.EASY_TEXTS
+            elif difficulty == "hard":
+                passages = cls.HARD_TEXTS
+            else:
+                passages = cls.MEDIUM_TEXTS
+            model = MarkovTextModel(passages)
+            cls._stream_models[difficulty] = model
+        
+        return stream_text(model, seed, chunk_words)
+    
     @classmethod
     def get_random_text(cls):
         """Get a random text from any difficulty level"""
-        all_texts = cls.EASY_TEXTS + cls.MEDIUM_TEXTS + cls.HARD_TEXTS
-        return random.choice(all_texts)
+        if cls._corpus is not None:
+            return cls._corpus.random_passage()
+        
+        texts, _ = cls._length_index()
+        return random.choice(texts)
     
     @classmethod
     def get_text_by_length(cls, min_length=100, max_length=500):
@@ -165,15 +327,24 @@ class TextGenerator:
         Returns:
             str: Text within specified length range
         """
-        all_texts = cls.EASY_TEXTS + cls.MEDIUM_TEXTS + cls.HARD_TEXTS
+        target_length = (min_length + max_length) / 2
         
-        # Filter texts by length
-        suitable_texts = [text for text in all_texts 
-                         if min_length <= len(text) <= max_length]
+        if cls._corpus is not None:
+            text = cls._corpus.random_passage_by_length(min_length, max_length)
+            if text is None:
+                text = cls._corpus.closest_passage_by_length(target_length)
+            return text
         
-        if suitable_texts:
-            return random.choice(suitable_texts)
+        texts, lengths = cls._length_index()
+        
+        # Texts in range form one contiguous slice of the sorted list
+        low = bisect_left(lengths, min_length)
+        high = bisect_right(lengths, max_length)
+        
+        if low < high:
+            return texts[random.randrange(low, high)]
         else:
             # If no text matches, return closest match
-            return min(all_texts, key=lambda x: abs(len(x) - (min_length + max_length) / 2))
-
+            position = bisect_left(lengths, target_length)
+            candidates = texts[max(0, position - 1):position + 1]
+            return min(candidates, key=lambda x: abs(len(x) - target_length))
@@ -0,0 +1,80 @@
+"""
+Text Stream Module
+Streams procedurally generated practice text for unbounded fixed-time tests.
+"""
+
+import random
+
+
+class MarkovTextModel:
+    """Word-level n-gram model built from sample passages"""
+
+    def __init__(self, passages, order=2):
+        """
+        Args:
+            passages: List of passages to learn word transitions from
+            order: Number of preceding words that select the next word
+        """
+        self.order = order
+        self.transitions = {}  # tuple of preceding words -> list of next words
+        self.starts = []       # word tuples that begin a sentence
+
+        for passage in passages:
+            words = passage.split()
+            sentence_start = True
+            for index in range(len(words) - order):
+                state = tuple(words[index:index + order])
+                if sentence_start:
+                    self.starts.append(state)
+                self.transitions.setdefault(state, []).append(words[index + order])
+                sentence_start = words[index].endswith((".", "!", "?"))
+
+    def generate_words(self, rng=random):
+        """
+        Yield an endless sequence of words
+
+        Args:
+            rng: Random number generator (seed a random.Random for repeatable text)
+        """
+        if not self.starts:
+            return
+
+        state = rng.choice(self.starts)
+        yield from state
+        while True:
+            followers = self.transitions.get(state)
+            if not followers or state[-1].endswith((".", "!", "?")) and rng.random() < 0.5:
+                # Dead end, or a sentence boundary: begin a new sentence
+                state = rng.choice(self.starts)
+                yield from state
+                continue
+            word = rng.choice(followers)
+            yield word
+            state = state[1:] + (word,)
+
+
+def stream_text(model, seed=None, chunk_words=20):
+    """
+    Stream generated text in chunks
+
+    Each chunk starts with a space so it can be appended directly to the
+    text already being typed.
+
+    Args:
+        model: MarkovTextModel to generate words from
+        seed: Seed for a repeatable stream, or None
+        chunk_words: Number of words per chunk
+
+    Returns:
+        generator: Yields text chunks on demand
+    """
+    words = model.generate_words(random.Random(seed))
+    while True:
+        chunk = []
+        for word in words:
+            chunk.append(word)
+            if len(chunk) == chunk_words:
+                break
+        if not chunk:
+            return
+        yield " " + " ".join(chunk)
@@ -0,0 +1,172 @@
+"""
+Text Viewport Module
+Shows a window of a long passage in a tk.Text widget.
+
+The widget holds only the text around the typing cursor: WINDOW_BEFORE
+characters behind it and WINDOW_AFTER ahead. The window slides as the
+typist progresses, so layout, wrapping and tags cost the same for a
+book-length passage as for a paragraph. The scrollbar is driven in
+whole-passage coordinates, and scrolling past the window's edge moves
+the window.
+"""
+
+import tkinter as tk
+
+
+# Characters kept in the widget behind and ahead of the window's center
+WINDOW_BEFORE = 2000
+WINDOW_AFTER = 6000
+
+# Recenter once the cursor is this far past WINDOW_BEFORE (text streamed
+# onto the end keeps growing the window until then)
+SLIDE_DISTANCE = 3000
+
+# Recenter when the cursor comes this close to a window edge that is not the passage's edge
+EDGE_MARGIN = 500
+
+# How far back from a window start to look for a line or word start to begin at
+SNAP_DISTANCE = 80
+
+
+class TextViewport:
+    """Windowed view of a passage in a read-only tk.Text"""
+
+    def __init__(self, display, on_rewindow=None):
+        """
+        Args:
+            display: tk.Text widget showing the window
+            on_rewindow: Called with the viewport after the window moved, to
+                reapply tags (moving the window clears them)
+        """
+        self.display = display
+        self.on_rewindow = on_rewindow
+        self.text = ""
+        self.start = 0  # Passage offset of the first character in the widget
+        self.end = 0    # Passage offset after the last character in the widget
+        self.scrollbar = None
+        self.edge_check_id = None
+
+    def attach(self, scrollbar):
+        """Drive a scrollbar from this viewport"""
+        self.scrollbar = scrollbar
+        scrollbar.config(command=self.yview)
+        self.display.config(yscrollcommand=self.on_yscroll)
+        self.display.yview(tk.MOVETO, self.display.yview()[0])  # Report the current position
+
+    def detach(self):
+        """Stop driving the scrollbar"""
+        self.display.config(yscrollcommand="")
+        self.scrollbar = None
+
+    def set_text(self, text):
+        """Show a new passage from its beginning"""
+        self.text = text
+        self._render(0, min(len(text), WINDOW_BEFORE + WINDOW_AFTER))
+
+    def extend(self, text):
+        """Continue with a longer passage (text streamed onto the end of the current one)"""
+        old_length = len(self.text)
+        self.text = text
+        if self.end == old_length:
+            self.display.config(state=tk.NORMAL)
+            self.display.insert(tk.END, text[old_length:])
+            self.display.config(state=tk.DISABLED)
+            self.end = len(text)
+
+    def index(self, offset):
+        """Widget index of a passage offset inside the window"""
+        return f"1.0 + {offset - self.start} chars"
+
+    def contains(self, offset):
+        """Whether a passage offset is inside the window"""
+        return self.start <= offset < self.end
+
+    def clip(self, start, end):
+        """Intersect a passage range with the window"""
+        return max(start, self.start), min(end, self.end)
+
+    def follow(self, cursor):
+        """
+        Keep the cursor well inside the window
+
+        Returns:
+            bool: True if the window moved (and on_rewindow was called)
+        """
+        length = len(self.text)
+        if ((self.end - self.start > WINDOW_BEFORE + WINDOW_AFTER
+                and cursor - self.start > WINDOW_BEFORE + SLIDE_DISTANCE)
+                or (self.start > 0 and cursor - self.start < EDGE_MARGIN)
+                or (self.end < length and self.end - cursor < EDGE_MARGIN)):
+            return self.center(cursor)
+        return False
+
+    def center(self, offset):
+        """
+        Move the window around a passage offset
+
+        Returns:
+            bool: True if the window moved
+        """
+        start = max(0, offset - WINDOW_BEFORE)
+        if start > 0:
+            # Begin at a line or word start, so the first line wraps naturally
+            low = max(0, start - SNAP_DISTANCE)
+            boundary = max(self.text.rfind("\n", low, start), self.text.rfind(" ", low, start))
+            if boundary != -1:
+                start = boundary + 1
+        end = min(len(self.text), offset + WINDOW_AFTER)
+        if (start, end) == (self.start, self.end):
+            return False
+        self._render(start, end)
+        if self.on_rewindow is not None:
+            self.on_rewindow(self)
+        return True
+
+    def _render(self, start, end):
+        """Replace the widget contents with the passage range start..end"""
+        self.start = start
+        self.end = end
+        self.display.config(state=tk.NORMAL)
+        self.display.delete(1.0, tk.END)
+        self.display.insert(1.0, self.text[start:end])
+        self.display.config(state=tk.DISABLED)
+
+    def top_offset(self):
+        """Passage offset of the first visible character"""
+        count = self.display.count("1.0", "@0,0", "chars")
+        return self.start + (count[0] if count else 0)
+
+    def yview(self, *args):
+        """Scrollbar command: positions are fractions of the whole passage"""
+        if args and args[0] == tk.MOVETO:
+            offset = min(int(float(args[1]) * len(self.text)), max(0, len(self.text) - 1))
+            if not self.contains(offset):
+                self.center(offset)
+            self.display.yview(self.index(offset))
+        else:
+            self.display.yview(*args)
+
+    def on_yscroll(self, first, last):
+        """Widget scroll report: convert it to whole-passage fractions for the scrollbar"""
+        if self.scrollbar is None:
+            return
+        first, last = float(first), float(last)
+        span = self.end - self.start
+        length = len(self.text) or 1
+        self.scrollbar.set((self.start + first * span) / length, (self.start + last * span) / length)
+
+        # Scrolled to an edge of the window with more passage beyond it
+        if ((first <= 0 and self.start > 0) or (last >= 1 and self.end < len(self.text))):
+            if self.edge_check_id is None:
+                self.edge_check_id = self.display.after_idle(self.scroll_past_edge)
+
+    def scroll_past_edge(self):
+        """Move the window around the visible text, keeping the view where it is"""
+        self.edge_check_id = None
+        first, last = self.display.yview()
+        if not ((first <= 0 and self.start > 0) or (last >= 1 and self.end < len(self.text))):
+            return
+        top = self.top_offset()
+        visible = int((last - first) * (self.end - self.start))
+        if self.center(top + visible // 2):
+            self.display.yview(self.index(top))
@@ -0,0 +1,373 @@
+"""
+Typing Server Module
+Runs many concurrent typing tests over TCP, one TestController per session.
+
+Usage:
+    python typing_server.py --host 127.0.0.1 --port 8765
+
+The protocol is line-delimited JSON. Each request is an object with an
+"op" field and gets exactly one response line, in order. A request's
+"seq" field, if present, is echoed in its response.
+
+    {"op": "start", "mode": "fixed_text", "difficulty": "medium", "time_limit": 60,
+     "scoring": "position"}
+        -> {"op": "started", "session": id, "text": "..."}
+    {"op": "key", "session": id, "char": "a"}         ("\\b" deletes the last character)
+    {"op": "edit", "session": id, "position": 0, "removed": 0, "text": "..."}
+        -> {"op": "ack", "position": n, "correct": true, "completed": false}
+           plus "append": "..." when more fixed-time text was streamed, and
+           "results": {...} when the test completed; "correct" is whether the
+           last typed character matches the sample (with word scoring, whether
+           the last typed word does)
+    {"op": "status", "session": id}
+        -> {"op": "status", "wpm": ..., "accuracy": ..., "elapsed": ..., "remaining": ...}
+    {"op": "pause" | "resume", "session": id}  -> {"op": "paused" | "resumed"}
+    {"op": "finish", "session": id}            -> {"op": "finished", "results": {...}}
+
+Errors are reported as {"op": "error", "error": "..."}, including for
+request lines longer than the stream limit (64 KiB). Sessions are
+closed when their test completes, on "finish", or when the connection
+that started them closes.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+from array import array
+
+from test_controller import TestController
+from text_generator import TextGenerator
+
+
+# Session ids combine a slot index with the slot's generation, so an id
+# from a closed session is rejected after its slot is reused
+SLOT_BITS = 20
+SLOT_MASK = (1 << SLOT_BITS) - 1
+
+# Stream more text when fewer than this many sample characters remain (fixed_time mode)
+STREAM_MARGIN = 200
+
+# Wait for the client to read responses once this much output is buffered
+WRITE_BUFFER_LIMIT = 64 * 1024
+
+DIFFICULTIES = ("easy", "medium", "hard")
+
+
+def encode_response(response):
+    """Encode a response object as a protocol line"""
+    return json.dumps(response).encode("utf-8") + b"\n"
+
+
+class SessionTable:
+    """Slot-based session storage: controllers are reused through a free list"""
+
+    def __init__(self, track_key_stats=False):
+        """
+        Args:
+            track_key_stats: Passed to each TestController; off by default
+                to keep per-session memory small
+
+        Sessions keep no keystroke log (the server never replays one) and no
+        rolling-WPM ring (status reports net WPM), so what grows with a test
+        is only the typed input and its match bitmap.
+        """
+        self.track_key_stats = track_key_stats
+        self.controllers = []          # slot -> TestController
+        self.streams = []              # slot -> fixed-time text stream, or None
+        self.generations = array('I')  # slot -> generation of its current session
+        self.in_use = bytearray()      # slot -> 1 while a session occupies it
+        self.free = []                 # Unoccupied slots
+        self.active = 0
+
+    def open(self):
+        """
+        Claim a slot for a new session
+
+        Returns:
+            tuple: (session id, TestController for the slot)
+        """
+        if self.free:
+            slot = self.free.pop()
+        else:
+            slot = len(self.controllers)
+            if slot > SLOT_MASK:
+                raise RuntimeError("Too many concurrent sessions")
+            self.controllers.append(TestController(
+                track_key_stats=self.track_key_stats, track_keystrokes=False,
+                rolling_windows=()))
+            self.streams.append(None)
+            self.generations.append(0)
+            self.in_use.append(0)
+        self.in_use[slot] = 1
+        self.active += 1
+        return (self.generations[slot] << SLOT_BITS) | slot, self.controllers[slot]
+
+    def slot(self, session_id):
+        """Get the slot of an open session, or None for unknown or closed ids"""
+        if not isinstance(session_id, int) or session_id < 0:
+            return None
+        slot = session_id & SLOT_MASK
+        if (slot < len(self.controllers) and self.in_use[slot]
+                and self.generations[slot] == session_id >> SLOT_BITS):
+            return slot
+        return None
+
+    def get(self, session_id):
+        """Get the controller of an open session, or None"""
+        slot = self.slot(session_id)
+        return None if slot is None else self.controllers[slot]
+
+    def close(self, session_id):
+        """Release a session's slot; returns False if it was not open"""
+        slot = self.slot(session_id)
+        if slot is None:
+            return False
+        controller = self.controllers[slot]
+        controller.sample_text = ""  # Don't keep the finished passage alive
+        controller.reset_test()
+        self.streams[slot] = None
+        self.generations[slot] = (self.generations[slot] + 1) & 0xFFFFFFFF
+        self.in_use[slot] = 0
+        self.free.append(slot)
+        self.active -= 1
+        return True
+
+
+class TypingServer:
+    """asyncio TCP server speaking the line-delimited JSON protocol"""
+
+    def __init__(self, host="127.0.0.1", port=8765, track_key_stats=False):
+        self.host = host
+        self.port = port
+        self.sessions = SessionTable(track_key_stats)
+        self.handlers = {
+            "start": self.op_start,
+            "key": self.op_key,
+            "edit": self.op_edit,
+            "status": self.op_status,
+            "pause": self.op_pause,
+            "resume": self.op_resume,
+            "finish": self.op_finish,
+        }
+
+    async def serve(self):
+        """Accept connections until cancelled"""
+        server = await asyncio.start_server(self.handle_client, self.host, self.port)
+        async with server:
+            await server.serve_forever()
+
+    async def handle_client(self, reader, writer):
+        """Serve one connection; its sessions are closed when it ends"""
+        owned = set()
+        try:
+            while True:
+                line = await self.read_request(reader)
+                if line is None:
+                    writer.write(encode_response({"op": "error", "error": "Request line too long"}))
+                    continue
+                if not line:
+                    break
+                writer.write(self.handle_line(line, owned))
+                if writer.transport.get_write_buffer_size() > WRITE_BUFFER_LIMIT:
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            for session_id in owned:
+                self.sessions.close(session_id)
+            writer.close()
+
+    @staticmethod
+    async def read_request(reader):
+        """
+        Read one request line
+
+        Returns:
+            bytes: The line (empty at the end of the stream), or None if it was
+                longer than the reader's limit; all of that line is discarded
+        """
+        oversized = False
+        while True:
+            try:
+                line = await reader.readuntil(b"\n")
+            except asyncio.IncompleteReadError as error:
+                line = error.partial  # Last line without a newline, or b"" at the end
+            except asyncio.LimitOverrunError as error:
+                # Drop what the reader has buffered and keep reading to the newline
+                oversized = True
+                await reader.readexactly(error.consumed)
+                continue
+            return None if oversized else line
+
+    def handle_line(self, line, owned):
+        """
+        Handle one request line
+
+        Args:
+            line: Request bytes
+            owned: Session ids started on this connection
+
+        Returns:
+            bytes: Response line
+        """
+        request = None
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("Request must be a JSON object")
+            handler = self.handlers.get(request.get("op"))
+            if handler is None:
+                raise ValueError(f"Unknown op: {request.get('op')}")
+            response = handler(request, owned)
+        except KeyError as error:
+            response = {"op": "error", "error": f"Missing field: {error.args[0]}"}
+        except (ValueError, TypeError, LookupError, RuntimeError) as error:
+            response = {"op": "error", "error": str(error)}
+        except Exception as error:
+            # One bad request must not take down the connection and its sessions
+            response = {"op": "error", "error": f"{type(error).__name__}: {error}"}
+        if isinstance(request, dict) and "seq" in request:
+            response["seq"] = request["seq"]
+        return encode_response(response)
+
+    def _session(self, request, owned):
+        """Look up the request's session, which must belong to the connection"""
+        session_id = request["session"]
+        controller = self.sessions.get(session_id)
+        if controller is None or session_id not in owned:
+            raise ValueError(f"Unknown session: {session_id}")
+        return session_id, controller
+
+    def _finish(self, session_id, owned):
+        """Close a completed session and return its results"""
+        results = self.sessions.get(session_id).get_results()
+        self.sessions.close(session_id)
+        owned.discard(session_id)
+        return results
+
+    def op_start(self, request, owned):
+        mode = request.get("mode", "fixed_text")
+        if mode not in ("fixed_time", "fixed_text"):
+            raise ValueError(f"Unknown mode: {mode}")
+        difficulty = request.get("difficulty", "medium")
+        if not isinstance(difficulty, str) or difficulty.lower() not in DIFFICULTIES:
+            raise ValueError(f"Unknown difficulty: {difficulty}")
+        time_limit = float(request.get("time_limit", 60))
+        if not math.isfinite(time_limit) or time_limit <= 0:
+            raise ValueError(f"Invalid time limit: {time_limit}")
+        scoring = request.get("scoring", "position")
+        if scoring not in ("position", "word"):
+            raise ValueError(f"Unknown scoring: {scoring}")
+
+        text = TextGenerator.get_text(difficulty=difficulty)
+        session_id, controller = self.sessions.open()
+        if mode == "fixed_time":
+            slot = session_id & SLOT_MASK
+            self.sessions.streams[slot] = TextGenerator.get_text_stream(difficulty)
+        controller.scoring = scoring
+        controller.start_test(mode=mode, time_limit=time_limit, sample_text=text)
+        owned.add(session_id)
+        return {"op": "started", "session": session_id, "text": text}
+
+    def op_key(self, request, owned):
+        session_id, controller = self._session(request, owned)
+        char = request["char"]
+        end = len(controller.user_input)
+        if char == "\b":
+            if end == 0:
+                return {"op": "ack", "position": 0, "correct": False, "completed": False}
+            return self._apply(session_id, controller, owned, end - 1, 1, "")
+        return self._apply(session_id, controller, owned, end, 0, char)
+
+    def op_edit(self, request, owned):
+        session_id, controller = self._session(request, owned)
+        position = int(request["position"])
+        removed = int(request.get("removed", 0))
+        if not 0 <= position <= len(controller.user_input):
+            raise ValueError(f"Position out of range: {position}")
+        if not 0 <= removed <= len(controller.user_input) - position:
+            raise ValueError(f"Removed length out of range: {removed}")
+        return self._apply(session_id, controller, owned, position, removed,
+                           str(request.get("text", "")))
+
+    def _apply(self, session_id, controller, owned, position, removed, inserted):
+        """Apply an edit and build the acknowledgement"""
+        response = {"op": "ack"}
+        if controller.update_time() or not controller.is_running():
+            # The time limit passed (or the test is paused) before this edit
+            response.update(position=controller.current_position, correct=False,
+                            completed=controller.is_completed())
+            if controller.is_completed():
+                response["results"] = self._finish(session_id, owned)
+            return response
+
+        completed = controller.apply_edit(position, removed, inserted)
+        end = controller.current_position
+        response["position"] = end
+        if controller.word_aligner is not None:
+            response["correct"] = controller.word_aligner.last_word_correct()
+        else:
+            # Input typed past the end of the sample has no bitmap entry
+            bitmap = controller.char_matcher.bitmap
+            response["correct"] = 0 < end <= len(bitmap) and bool(bitmap[end - 1])
+        response["completed"] = completed
+
+        if completed:
+            response["results"] = self._finish(session_id, owned)
+        elif controller.test_mode == "fixed_time":
+            if controller.get_remaining_sample_length() < STREAM_MARGIN:
+                chunk = next(self.sessions.streams[session_id & SLOT_MASK])
+                controller.extend_sample_text(chunk)
+                response["append"] = chunk
+        return response
+
+    def op_status(self, request, owned):
+        session_id, controller = self._session(request, owned)
+        if controller.update_time():
+            return {"op": "finished", "results": self._finish(session_id, owned)}
+        return {
+            "op": "status",
+            "wpm": round(controller.get_net_wpm(), 1),
+            "accuracy": round(controller.get_current_accuracy(), 1),
+            "elapsed": round(controller.get_elapsed_time(), 2),
+            "remaining": controller.get_remaining_time()
+        }
+
+    def op_pause(self, request, owned):
+        _, controller = self._session(request, owned)
+        controller.pause_test()
+        return {"op": "paused"}
+
+    def op_resume(self, request, owned):
+        _, controller = self._session(request, owned)
+        controller.resume_test()
+        return {"op": "resumed"}
+
+    def op_finish(self, request, owned):
+        session_id, controller = self._session(request, owned)
+        controller.stop_test()
+        return {"op": "finished", "results": self._finish(session_id, owned)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve typing tests over TCP")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="Port to listen on")
+    parser.add_argument("--corpus", help="Indexed passage corpus (see passage_corpus.py)")
+    parser.add_argument("--key-stats", action="store_true",
+                        help="Collect per-key latency statistics for each session")
+    args = parser.parse_args(argv)
+
+    if args.corpus:
+        TextGenerator.load_corpus(args.corpus)
+    server = TypingServer(args.host, args.port, track_key_stats=args.key_stats)
+    print(f"Serving typing tests on {args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,12 +1,77 @@
+import time
+
+# Launch time, taken before the remaining imports, for startup timing
+STARTUP_NS = time.perf_counter_ns()
+
+import math
+import os
+import queue
+import sys
+import threading
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk
+from adaptive_selection import merge_weakness, weakness_from_stats
 from test_controller import TestController
-from results_window import ResultsWindow
 from text_generator import TextGenerator
+from text_viewport import TextViewport
+
+
+# Modifier bits (Control plus Alt, or Command on macOS) whose key presses the
+# input field does not turn into plain text edits
+if sys.platform == "win32":
+    SHORTCUT_STATE_MASK = 0x4 | 0x20000
+else:
+    SHORTCUT_STATE_MASK = 0x4 | 0x8
+
+SHIFT_STATE = 0x1
+
+# Keys the Text class binds to pasting or cutting: Insert pastes the PRIMARY
+# selection, F18 and F20 are the Paste and Cut keys. Blocked during a test.
+CLIPBOARD_KEYSYMS = frozenset(("Insert", "F18", "F20"))
+
+# Keys that never edit a Text widget: modifiers, navigation, and the keys
+# the Text class binds to nothing (KP_Enter and Shift-Tab)
+NON_EDITING_KEYSYMS = frozenset((
+    "Shift_L", "Shift_R", "Control_L", "Control_R", "Alt_L", "Alt_R", "Meta_L", "Meta_R",
+    "Super_L", "Super_R", "Caps_Lock", "Num_Lock", "ISO_Level3_Shift", "Escape",
+    "Left", "Right", "Up", "Down", "Home", "End", "Prior", "Next",
+    "KP_Enter", "ISO_Left_Tab"
+))
+
+
+def report_startup(stage):
+    """Print the time since launch for a startup stage (TYPING_TEST_STARTUP_TIMING=1)"""
+    if os.environ.get("TYPING_TEST_STARTUP_TIMING"):
+        elapsed_ms = (time.perf_counter_ns() - STARTUP_NS) / 1e6
+        print(f"startup: {stage:12s} | {elapsed_ms:9.1f} ms", file=sys.stderr)
+
+
+def show_message(kind, title, message):
+    """Show a message box, importing tkinter.messagebox on first use"""
+    from tkinter import messagebox
+    getattr(messagebox, kind)(title, message)
 
 
 class TypingTestApp:
-    def __init__(self, root):
+    # Stream more text when fewer than this many sample characters remain (fixed_time mode)
+    STREAM_MARGIN = 200
+    
+    # Length of a fixed_time test in seconds
+    TIME_LIMIT = 60
+    
+    # Compare the input field with the tracked input after this many key edits
+    RECONCILE_INTERVAL = 50
+    
+    # How often the Tk event loop checks whether the corpus has loaded (milliseconds)
+    CORPUS_POLL_INTERVAL = 50
+    
+    # Passages per difficulty the prefetcher keeps ready
+    PREFETCH_DEPTH = 3
+    
+    # How long to wait before refilling the back buffer when no passage is ready (milliseconds)
+    BACK_FILL_RETRY = 20
+    
+    def __init__(self, root, corpus_path=None):
         self.root = root
         self.root.title("Typing Speed Test")
         self.root.geometry("800x600")
@@ -25,15 +90,130 @@ class TypingTestApp:
         # Test state variables
         self.test_mode = tk.StringVar(value="fixed_time")
         self.difficulty = tk.StringVar(value="medium")
+        self.target_weak_keys = tk.BooleanVar(value=False)
+        self.word_scoring = tk.BooleanVar(value=False)
         self.test_controller = TestController()
         
+        # Slow and error-prone keys from this session's tests (adaptive_selection profile)
+        self.weakness = {}
+        
+        # Results history and analysis, created by finish_startup after the first paint
+        self.results_store = None
+        self.results_pipeline = None
+        self.results_window = None
+        self.user_name = None
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        
+        # Optional passage corpus, opened on a background thread
+        self.corpus_loaded = queue.Queue()
+        self.corpus_pending = False
+        if corpus_path:
+            self.load_corpus_in_background(corpus_path)
+        
         # Text generator
         self.text_generator = TextGenerator()
         self.sample_text = ""
         self.user_input = ""
+        self.text_stream = None
+        self.cursor_offset = None  # Sample offset carrying the "current" tag
+        
+        # Background passage fetching (started by finish_startup) and the
+        # pending refill of the back text display
+        self.prefetcher = None
+        self.back_fill_id = None
+        
+        # Input tracking: edits are taken from key events and periodically
+        # reconciled against the input field contents
+        self.input_dirty = False
+        self.edits_since_reconcile = 0
+        
+        # Pending root.after callbacks for the test deadline and the status display
+        self.deadline_id = None
+        self.status_refresh_id = None
         
         self.create_ui()
         
+        # Everything not needed for the first frame waits until it has been drawn.
+        # The first idle pass maps the window; the redraws it triggers are
+        # flushed at the start of finish_startup, which runs from a timer
+        # queued behind that pass.
+        self.root.after_idle(lambda: self.root.after(0, self.finish_startup))
+        
+    def finish_startup(self):
+        """Load the first passage and the results modules once the window has painted"""
+        self.root.update_idletasks()  # Finish drawing the first frame
+        report_startup("first paint")
+        self.load_sample_text()
+        
+        from passage_prefetcher import PassagePrefetcher
+        self.prefetcher = PassagePrefetcher(
+            lambda difficulty: TextGenerator.get_text(difficulty=difficulty),
+            depth=self.PREFETCH_DEPTH)
+        self.prefetcher.prime(("easy", "medium", "hard"))
+        
+        import getpass
+        from results_pipeline import ResultsPipeline
+        from results_store import ResultsStore
+        
+        # Results history, saved in the background
+        self.results_store = ResultsStore()
+        self.user_name = getpass.getuser()
+        
+        # Results analysis runs off the main thread and fills the results window in
+        self.results_pipeline = ResultsPipeline(self.root)
+        self.results_pipeline.add_analysis("history", self.analyze_history)
+        
+        if not self.corpus_pending:
+            report_startup("ready")
+        
+        # Build the results window while idle, so the first result only fills it in
+        self.root.after_idle(self.build_results_window)
+        
+    def build_results_window(self):
+        """Create the results window, hidden until a test completes"""
+        if self.results_window is None:
+            from results_window import ResultsWindow
+            self.results_window = ResultsWindow(self.root)
+        
+    def load_corpus_in_background(self, path):
+        """Open a passage corpus on a worker thread; passages switch over once it is ready"""
+        def load():
+            try:
+                corpus = TextGenerator.open_corpus(path)
+            except (OSError, ValueError) as error:
+                self.corpus_loaded.put((None, error))
+            else:
+                self.corpus_loaded.put((corpus, None))
+                # Corpus files from before the n-gram index was stored get it
+                # built here; until then "Target weak keys" picks random passages
+                corpus.ngram_index(build=True)
+        
+        self.corpus_pending = True
+        threading.Thread(target=load, name="CorpusLoader", daemon=True).start()
+        self.root.after(self.CORPUS_POLL_INTERVAL, self.poll_corpus)
+        
+    def poll_corpus(self):
+        """Tk thread: install the corpus once the worker has opened it"""
+        try:
+            corpus, error = self.corpus_loaded.get_nowait()
+        except queue.Empty:
+            self.root.after(self.CORPUS_POLL_INTERVAL, self.poll_corpus)
+            return
+        
+        self.corpus_pending = False
+        if error is not None:
+            show_message("showerror", "Corpus", f"Could not load the passage corpus: {error}")
+        else:
+            TextGenerator.use_corpus(corpus)
+            # Passages fetched from the built-in texts are stale now
+            self.back_text = None
+            if self.prefetcher is not None:
+                self.prefetcher.flush()
+            if self.test_controller.test_state == "idle":
+                self.load_sample_text()
+        if self.results_store is not None:
+            report_startup("ready")
+        
     def create_ui(self):
         # Header Frame with peach background
         header_frame = tk.Frame(self.root, bg=self.colors['peach'])
@@ -65,6 +245,14 @@ class TypingTestApp:
         diff_combo.pack(side=tk.LEFT, padx=2)
         diff_combo.bind("<<ComboboxSelected>>", lambda e: self.load_sample_text())
         
+        # Adaptive text selection
+        ttk.Checkbutton(controls_frame, text="Target weak keys",
+                        variable=self.target_weak_keys).pack(side=tk.LEFT, padx=5)
+        
+        # Word scoring: align typed words with the sample so a skipped character costs one error
+        ttk.Checkbutton(controls_frame, text="Word scoring",
+                        variable=self.word_scoring).pack(side=tk.LEFT, padx=5)
+        
         # New text button
         new_text_button = ttk.Button(controls_frame, text="New Text", command=self.load_sample_text)
         new_text_button.pack(side=tk.LEFT, padx=5)
@@ -79,14 +267,25 @@ class TypingTestApp:
                                    font=("Arial", 10, "bold"))
         text_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
         
-        self.text_display = tk.Text(text_frame, wrap=tk.WORD, font=("Courier", 12), 
-                                   height=15, state=tk.DISABLED, bg="#FFFFFF",
-                                   selectbackground=self.colors['mint'])
-        self.text_display.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        
-        text_scrollbar = ttk.Scrollbar(text_frame, orient=tk.VERTICAL, command=self.text_display.yview)
-        text_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.text_display.config(yscrollcommand=text_scrollbar.set)
+        # Two stacked text displays: the visible one, and a back buffer holding
+        # the next passage so "New Text" only has to raise it. Each shows a
+        # window of its passage around the typing cursor (see text_viewport.py).
+        display_frame = tk.Frame(text_frame, bg="#FFFFFF")
+        display_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        display_frame.rowconfigure(0, weight=1)
+        display_frame.columnconfigure(0, weight=1)
+        self.viewport = TextViewport(self.create_text_display(display_frame),
+                                     on_rewindow=self.tag_window)
+        self.back_viewport = TextViewport(self.create_text_display(display_frame),
+                                          on_rewindow=self.tag_window)
+        self.back_text = None  # (difficulty, passage) held by back_viewport
+        self.text_display = self.viewport.display
+        self.text_display.lift()
+        
+        # The scrollbar covers the whole passage, not just the window in the widget
+        self.text_scrollbar = ttk.Scrollbar(text_frame, orient=tk.VERTICAL)
+        self.text_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.viewport.attach(self.text_scrollbar)
         
         # Bottom frame - Input and controls with peach background
         bottom_frame = tk.Frame(self.root, bg=self.colors['peach'])
@@ -108,74 +307,184 @@ class TypingTestApp:
         self.start_button = ttk.Button(button_frame, text="Start", command=self.start_test)
         self.start_button.pack(side=tk.LEFT, padx=5)
         
+        self.pause_button = ttk.Button(button_frame, text="Pause", command=self.toggle_pause, state=tk.DISABLED)
+        self.pause_button.pack(side=tk.LEFT, padx=5)
+        
         self.reset_button = ttk.Button(button_frame, text="Reset", command=self.reset_test, state=tk.DISABLED)
         self.reset_button.pack(side=tk.LEFT, padx=5)
         
-        # Load initial text
-        self.load_sample_text()
+        # Live test status
+        self.status_text = tk.StringVar(value="")
+        tk.Label(button_frame, textvariable=self.status_text, bg=self.colors['peach'],
+                font=("Arial", 10, "bold")).pack(side=tk.RIGHT, padx=5)
+        
+    def create_text_display(self, parent):
+        """Create a read-only sample text widget with the feedback tags"""
+        display = tk.Text(parent, wrap=tk.WORD, font=("Courier", 12), 
+                          height=15, state=tk.DISABLED, bg="#FFFFFF",
+                          selectbackground=self.colors['mint'])
+        display.grid(row=0, column=0, sticky="nsew")
+        
+        # Per-character feedback tags
+        display.tag_configure("correct", foreground="#2E7D32")
+        display.tag_configure("incorrect", foreground="#C62828", background="#FFD6D6")
+        display.tag_configure("current", background=self.colors['lavender'], underline=True)
+        display.tag_raise("current")
+        return display
         
     def on_mode_change(self):
         """Handle test mode change"""
+        # A running or paused test keeps its mode; put the selector back
+        if self.test_controller.test_state in ("running", "paused"):
+            self.test_mode.set(self.test_controller.test_mode)
+            return
+        
         # Reload text when mode changes
-        if not self.test_controller.is_running():
-            self.load_sample_text()
+        self.load_sample_text()
         
     def load_sample_text(self):
         """Load sample text into the display area"""
-        # Don't change text if test is running
-        if self.test_controller.is_running():
-            messagebox.showwarning("Test Running", "Cannot change text while test is running. Please reset first.")
+        # Don't change text while a test is running or paused: the controller scores against it
+        if self.test_controller.test_state in ("running", "paused"):
+            show_message("showwarning", "Test Running", "Cannot change text while test is running. Please reset first.")
             return
         
-        # Get new text based on difficulty
-        self.sample_text = self.text_generator.get_text(difficulty=self.difficulty.get())
+        # Get new text based on difficulty, favouring weak keys if selected
+        difficulty = self.difficulty.get()
+        if self.target_weak_keys.get():
+            text = self.text_generator.get_adaptive_text(
+                difficulty=difficulty, weakness=self.weakness)
+        elif self.back_text is not None and self.back_text[0] == difficulty:
+            # The next passage is already laid out in the back buffer
+            self.swap_text_display()
+            return
+        else:
+            text = self.next_passage(difficulty)
+        self.show_sample_text(text)
+        
+    def next_passage(self, difficulty):
+        """Take a prefetched passage, or fetch one now if none is ready"""
+        text = self.prefetcher.take(difficulty) if self.prefetcher is not None else None
+        if text is None:
+            text = self.text_generator.get_text(difficulty=difficulty)
+        return text
+        
+    def show_sample_text(self, text):
+        """Use a specific sample text for the next test and display it"""
+        self.sample_text = text
+        self.viewport.set_text(text)
+        self.cursor_offset = None
+        self.schedule_back_fill()
+        
+    def swap_text_display(self):
+        """Show the back buffer's passage by raising it over the current display"""
+        front, back = self.viewport, self.back_viewport
+        self.sample_text = self.back_text[1]
+        self.back_text = None
+        front.detach()
+        back.attach(self.text_scrollbar)
+        back.display.lift()
+        self.viewport, self.back_viewport = back, front
+        self.text_display = back.display
+        self.cursor_offset = None
+        
+        # The old display still carries the last test's feedback tags; it is
+        # refilled in the background, off the click that swapped it out
+        self.schedule_back_fill()
+        
+    def schedule_back_fill(self):
+        """Refill the back buffer once the event loop is idle"""
+        if self.back_fill_id is None:
+            self.back_fill_id = self.root.after_idle(self.fill_back_display)
+        
+    def fill_back_display(self):
+        """Lay out the next passage of the selected difficulty in the back buffer"""
+        self.back_fill_id = None
+        difficulty = self.difficulty.get()
+        if self.back_text is not None and self.back_text[0] == difficulty:
+            return
+        if self.prefetcher is None:
+            return
+        text = self.prefetcher.take(difficulty)
+        if text is None:
+            if self.prefetcher.has_failed(difficulty):
+                # Nothing is coming; the next load fetches its passage directly
+                return
+            # Not fetched yet: try again shortly rather than reading on the Tk thread
+            self.back_fill_id = self.root.after(self.BACK_FILL_RETRY, self.fill_back_display)
+            return
+        self.back_viewport.set_text(text)
+        self.back_text = (difficulty, text)
         
-        # Update display
-        self.text_display.config(state=tk.NORMAL)
-        self.text_display.delete(1.0, tk.END)
-        self.text_display.insert(1.0, self.sample_text)
-        self.text_display.config(state=tk.DISABLED)
+    def start_test(self, time_limit=None):
+        """
+        Start the typing test
         
-    def start_test(self):
-        """Start the typing test"""
+        Args:
+            time_limit: Seconds for a fixed_time test (TIME_LIMIT if None);
+                replays pass the recorded limit
+        """
         # Validation
         if not self.sample_text or len(self.sample_text.strip()) == 0:
-            messagebox.showerror("Error", "No text available. Please load a text first.")
+            show_message("showerror", "Error", "No text available. Please load a text first.")
             return
         
         if self.test_controller.is_running():
             return
         
         mode = self.test_mode.get()
-        time_limit = 60  # Default 60 seconds for fixed_time mode
+        if time_limit is None:
+            time_limit = self.TIME_LIMIT
         
         try:
+            self.test_controller.scoring = "word" if self.word_scoring.get() else "position"
             self.test_controller.start_test(mode=mode, time_limit=time_limit, sample_text=self.sample_text)
             self.user_input = ""
+            self.input_dirty = False
+            self.edits_since_reconcile = 0
+            
+            # Fixed-time tests continue with generated text past the end of the passage
+            if mode == "fixed_time":
+                self.text_stream = self.text_generator.get_text_stream(difficulty=self.difficulty.get())
+            else:
+                self.text_stream = None
+            
+            self.clear_highlighting()
+            self.update_highlighting()
+            
             self.input_field.config(state=tk.NORMAL)
             self.input_field.delete(1.0, tk.END)
             self.input_field.focus()
             self.start_button.config(state=tk.DISABLED)
+            self.pause_button.config(state=tk.NORMAL, text="Pause")
             self.reset_button.config(state=tk.NORMAL)
             
             # Bind input events
             self.input_field.bind('<KeyPress>', self.on_key_press)
             self.input_field.bind('<KeyRelease>', self.on_key_release)
+            self.input_field.bind('<ButtonRelease>', self.on_button_release)
             
-            # Start timer update
-            self.update_timer()
+            # Book the end of the test and start the status display
+            self.schedule_deadline()
+            self.refresh_status()
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to start test: {str(e)}")
+            show_message("showerror", "Error", f"Failed to start test: {str(e)}")
             
     def reset_test(self):
         """Reset the typing test"""
+        self.cancel_timers()
         self.test_controller.reset_test()
         self.user_input = ""
+        self.text_stream = None
+        self.status_text.set("")
+        self.clear_highlighting()
         self.input_field.config(state=tk.DISABLED)
         self.input_field.delete(1.0, tk.END)
         self.input_field.unbind('<KeyPress>')
         self.input_field.unbind('<KeyRelease>')
+        self.input_field.unbind('<ButtonRelease>')
         self.start_button.config(state=tk.NORMAL)
+        self.pause_button.config(state=tk.DISABLED, text="Pause")
         self.reset_button.config(state=tk.DISABLED)
         
     def on_key_press(self, event):
@@ -184,8 +493,13 @@ class TypingTestApp:
         if not self.test_controller.is_running():
             return "break"
         
+        # Block pasting from the selection, as Ctrl+V is blocked below
+        if event.keysym in CLIPBOARD_KEYSYMS:
+            return "break"
+        
         # Allow special keys for navigation
         if event.keysym in ['BackSpace', 'Delete', 'Left', 'Right', 'Up', 'Down', 'Home', 'End']:
+            self.track_key_edit(event)
             return
         
         # Prevent certain key combinations that might interfere
@@ -193,37 +507,278 @@ class TypingTestApp:
             if event.keysym in ['c', 'v', 'x', 'a']:  # Copy, Paste, Cut, Select All
                 return "break"  # Prevent clipboard operations during test
         
+        self.track_key_edit(event)
+        
     def on_key_release(self, event):
-        """Handle key release events - update controller after input changes"""
+        """Handle key release events - reconcile with the input field when needed"""
         if not self.test_controller.is_running():
             return
         
-        # Get current input text
-        current_input = self.input_field.get(1.0, tk.END).rstrip('\n')
-        
-        # Update user input
-        self.user_input = current_input
+        if self.input_dirty or self.edits_since_reconcile >= self.RECONCILE_INTERVAL:
+            self.after_input_change(self.reconcile_input())
+    
+    def on_button_release(self, event):
+        """Handle mouse releases, which may paste text into the input field"""
+        if self.test_controller.is_running():
+            self.input_dirty = True
+            self.root.after_idle(self.on_key_release, event)
+    
+    def predict_key_edit(self, event):
+        """
+        Predict the edit the input field will make for a key press
+        
+        Only edits the Text class bindings are known to make are predicted;
+        any other key marks the input dirty, so it is reconciled on release.
+        
+        Returns:
+            tuple: (position, removed, inserted), () if the key makes no edit,
+                or None if the edit cannot be predicted
+        """
+        field = self.input_field
+        keysym = event.keysym
+        if keysym in NON_EDITING_KEYSYMS:
+            return ()
+        
+        # Selection replacement and modifier shortcuts are left to reconciliation
+        if field.tag_ranges("sel") or event.state & SHORTCUT_STATE_MASK:
+            return None
+        
+        # Position of the insert cursor; typing at the end needs no counting
+        if field.compare("insert", "==", "end-1c"):
+            position = len(self.user_input)
+        else:
+            count = field.count("1.0", "insert", "chars")
+            position = count[0] if count else 0
+        
+        if keysym == "BackSpace":
+            return (position - 1, 1, "") if position > 0 else ()
+        if keysym == "Delete":
+            if event.state & SHIFT_STATE:
+                return None  # Shift-Delete cuts on Windows
+            return (position, 1, "") if position < len(self.user_input) else ()
+        if keysym == "Return":
+            return (position, 0, "\n")
+        if keysym == "Tab":
+            # The Text class inserts a tab for Tab and ignores Shift-Tab
+            return () if event.state & SHIFT_STATE else (position, 0, "\t")
+        
+        # Other keys insert their character through the <KeyPress> class binding
+        char = event.char
+        if len(char) == 1 and char >= " " and char != "\x7f":
+            return (position, 0, char)
+        return None
+    
+    def track_key_edit(self, event):
+        """Apply the edit a key press is about to make to the controller"""
+        edit = self.predict_key_edit(event)
+        if edit is None:
+            self.input_dirty = True
+            return
+        if not edit:
+            return
         
-        # Update controller and check if test completed
-        test_completed = self.test_controller.update_input(self.user_input)
+        self.edits_since_reconcile += 1
+        test_completed = self.test_controller.apply_edit(*edit)
+        self.user_input = self.test_controller.user_input
+        self.after_input_change(test_completed)
+    
+    def reconcile_input(self):
+        """
+        Resynchronize the controller with the input field contents
+        
+        Returns:
+            bool: True if the test completed
+        """
+        self.input_dirty = False
+        self.edits_since_reconcile = 0
+        
+        current_input = self.input_field.get("1.0", "end-1c")
+        if current_input == self.user_input:
+            return False
+        
+        test_completed = self.test_controller.update_input(current_input)
+        self.user_input = self.test_controller.user_input
+        return test_completed
+    
+    def after_input_change(self, test_completed):
+        """Refresh feedback after the input changed, ending the test if completed"""
+        self.update_highlighting()
         
         # End test if completed
         if test_completed:
             self.end_test()
+            return
+        
+        self.extend_sample_text()
+    
+    def extend_sample_text(self):
+        """Append streamed text before the typist reaches the end of the passage"""
+        if self.text_stream is None:
+            return
+        
+        if self.test_controller.get_remaining_sample_length() >= self.STREAM_MARGIN:
+            return
+        
+        chunk = next(self.text_stream, None)
+        if not chunk:
+            return
+        
+        self.test_controller.extend_sample_text(chunk)
+        self.sample_text = self.test_controller.sample_text
+        
+        # Append only the new chunk to the display
+        self.viewport.extend(self.sample_text)
+        
+        # Score input already typed past the old end of the passage
+        self.update_highlighting()
+    
+    def _display_index(self, offset):
+        """Convert a sample text offset (inside the viewport window) to a text_display index"""
+        return self.viewport.index(offset)
+    
+    def update_highlighting(self):
+        """
+        Color the characters whose correctness changed since the last update
+        
+        Only the range reported by the controller is retagged, as runs of
+        equal correctness, so the cost does not grow with the passage length.
+        Ranges are clipped to the viewport window; when the cursor moves the
+        window, tag_window retags the new window instead.
+        """
+        start, old_end, new_end = self.test_controller.changed_range
+        viewport = self.viewport
+        display = self.text_display
+        cursor = self.test_controller.current_position
+        
+        if not viewport.follow(cursor):
+            first, last = viewport.clip(start, max(old_end, new_end))
+            if last > first:
+                display.tag_remove("correct", self._display_index(first), self._display_index(last))
+                display.tag_remove("incorrect", self._display_index(first), self._display_index(last))
+            self.tag_runs(*viewport.clip(start, new_end))
+            
+            # Move the cursor marker
+            if self.cursor_offset is not None:
+                if viewport.contains(self.cursor_offset):
+                    display.tag_remove("current", self._display_index(self.cursor_offset))
+                self.cursor_offset = None
+            if cursor < len(self.sample_text) and viewport.contains(cursor):
+                self.cursor_offset = cursor
+                display.tag_add("current", self._display_index(cursor))
+        
+        # Keep the cursor in view
+        if viewport.contains(cursor):
+            display.see(self._display_index(cursor))
+    
+    def tag_runs(self, start, end):
+        """Tag sample offsets start..end as runs of correct and incorrect characters"""
+        bitmap = self.test_controller.char_matcher.bitmap
+        position = start
+        while position < end:
+            value = bitmap[position]
+            run_end = bitmap.find(1 - value, position, end)
+            if run_end == -1:
+                run_end = end
+            self.text_display.tag_add("correct" if value else "incorrect",
+                                      self._display_index(position), self._display_index(run_end))
+            position = run_end
+    
+    def tag_window(self, viewport):
+        """Reapply the feedback tags after a viewport moved its window (which cleared them)"""
+        if viewport is not self.viewport:
+            return
+        self.cursor_offset = None
+        if viewport.text is not self.test_controller.sample_text:
+            return  # The displayed passage has not been typed yet
+        self.tag_runs(*viewport.clip(0, len(self.test_controller.char_matcher.bitmap)))
+        cursor = self.test_controller.current_position
+        if cursor < len(self.sample_text) and viewport.contains(cursor):
+            self.cursor_offset = cursor
+            self.text_display.tag_add("current", self._display_index(cursor))
+    
+    def clear_highlighting(self):
+        """Remove all feedback tags from the text display"""
+        for tag in ("correct", "incorrect", "current"):
+            self.text_display.tag_remove(tag, "1.0", tk.END)
+        self.cursor_offset = None
     
     def end_test(self):
         """End the typing test"""
+        # Pick up any edits the key events did not account for
+        if self.test_controller.is_running():
+            self.reconcile_input()
+            self.update_highlighting()
+        
         self.test_controller.stop_test()
+        self.cancel_timers()
+        self.refresh_status()
         self.input_field.config(state=tk.DISABLED)
         self.input_field.unbind('<KeyPress>')
         self.input_field.unbind('<KeyRelease>')
+        self.input_field.unbind('<ButtonRelease>')
         self.start_button.config(state=tk.NORMAL)
+        self.pause_button.config(state=tk.DISABLED, text="Pause")
         
         # Show results window
         self.show_results()
         
+    def toggle_pause(self):
+        """Pause or resume the running test"""
+        if self.test_controller.is_running():
+            self.pause_test()
+        else:
+            self.resume_test()
+    
+    def pause_test(self):
+        """Pause the test, suspending the deadline and the input field"""
+        if not self.test_controller.is_running():
+            return
+        
+        if self.reconcile_input():
+            self.after_input_change(True)
+            return
+        
+        self.test_controller.pause_test()
+        self.cancel_timers()
+        self.refresh_status()
+        self.input_field.config(state=tk.DISABLED)
+        self.pause_button.config(text="Resume")
+    
+    def resume_test(self):
+        """Resume a paused test, rebooking the deadline for the remaining time"""
+        if self.test_controller.test_state != "paused":
+            return
+        
+        self.test_controller.resume_test()
+        self.input_field.config(state=tk.NORMAL)
+        self.input_field.focus()
+        self.pause_button.config(text="Pause")
+        self.schedule_deadline()
+        self.refresh_status()
+    
+    def schedule_deadline(self):
+        """Book a single callback at the fixed-time deadline"""
+        if self.deadline_id is not None:
+            self.root.after_cancel(self.deadline_id)
+            self.deadline_id = None
+        
+        remaining = self.test_controller.get_remaining_time()
+        if remaining is None or not self.test_controller.is_running():
+            return
+        
+        self.deadline_id = self.root.after(math.ceil(remaining * 1000), self.update_timer)
+    
+    def cancel_timers(self):
+        """Cancel the pending deadline and status refresh callbacks"""
+        for callback_id in (self.deadline_id, self.status_refresh_id):
+            if callback_id is not None:
+                self.root.after_cancel(callback_id)
+        self.deadline_id = None
+        self.status_refresh_id = None
+    
     def update_timer(self):
-        """Update the timer and check if test should end"""
+        """Handle the deadline callback and end the test if time is up"""
+        self.deadline_id = None
         if self.test_controller.is_running():
             # Update time in controller
             time_reached = self.test_controller.update_time()
@@ -233,17 +788,106 @@ class TypingTestApp:
                 self.end_test()
                 return
             
-            self.root.after(100, self.update_timer)
+            # Woke up early (timer rounding): book the remainder
+            self.schedule_deadline()
+    
+    def refresh_status(self):
+        """
+        Update the live status display
+        
+        The next refresh is booked for when the displayed whole second
+        changes, rather than polling at a fixed rate.
+        """
+        self.status_refresh_id = None
+        controller = self.test_controller
+        remaining = controller.get_remaining_time()
+        
+        if remaining is not None:
+            seconds = remaining
+            time_text = f"Time left: {math.ceil(seconds)}s"
+        else:
+            seconds = controller.get_elapsed_time()
+            time_text = f"Time: {int(seconds)}s"
+        
+        # Every figure here is kept incrementally by the controller
+        self.status_text.set(
+            f"{time_text}  |  WPM: {controller.get_net_wpm():.0f} net, "
+            f"{controller.get_raw_wpm():.0f} raw (last 5s: {controller.get_rolling_wpm(5):.0f}, "
+            f"15s: {controller.get_rolling_wpm(15):.0f})  |  "
+            f"Accuracy: {controller.get_current_accuracy():.0f}%"
+        )
+        
+        if controller.is_running():
+            delay = (seconds - math.floor(seconds)) if remaining is not None else (1 - seconds % 1)
+            self.status_refresh_id = self.root.after(max(1, math.ceil(delay * 1000)), self.refresh_status)
     
     def show_results(self):
         """Show results window"""
-        results = self.test_controller.get_results()
-        ResultsWindow(self.root, results)
+        from results_pipeline import make_snapshot
+        
+        snapshot = make_snapshot(self.test_controller)
+        snapshot["difficulty"] = self.difficulty.get()
+        results = snapshot["results"]
+        self.results_store.save(results.to_dict(), user=self.user_name,
+                                difficulty=snapshot["difficulty"])
+        
+        if snapshot["key_stats"] is not None:
+            self.weakness = merge_weakness(self.weakness, weakness_from_stats(snapshot["key_stats"]))
+        
+        # Show the summary right away; analysis sections arrive from the pipeline.
+        # The window is normally built after startup and reused for every test.
+        self.build_results_window()
+        self.results_window.show(results)
+        self.results_pipeline.submit(snapshot, self.results_window.set_section)
+    
+    def analyze_history(self, snapshot):
+        """Pipeline analysis (worker thread): personal best and recent average"""
+        results = snapshot["results"]
+        self.results_store.flush()
+        best = self.results_store.personal_best(self.user_name, results.test_mode,
+                                                snapshot["difficulty"])
+        recent = self.results_store.moving_average(self.user_name, window=10,
+                                                   test_mode=results.test_mode,
+                                                   difficulty=snapshot["difficulty"], limit=1)
+        return {
+            "personal_best": best,
+            "average": recent[-1][2] if recent else None
+        }
+    
+    def on_close(self):
+        """Commit saved results and close the application"""
+        self.cancel_timers()
+        if self.prefetcher is not None:
+            self.prefetcher.close()
+        if self.results_pipeline is not None:
+            self.results_pipeline.close()
+            self.results_store.close()
+        self.root.destroy()
 
 
-def main():
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Typing speed test")
+    parser.add_argument("--instrument", action="store_true",
+                        help="Time the hot-path methods (F12 shows the statistics)")
+    parser.add_argument("--instrument-output",
+                        help="Write instrumentation at exit (.json, or .pstats for a cProfile dump)")
+    args = parser.parse_args(argv)
+    
+    # Optional indexed passage corpus (built with passage_corpus.py)
+    corpus_path = os.environ.get("TYPING_TEST_CORPUS")
+    
+    # Instrumentation is opt-in; when off, the instrumentation module is never imported
+    instrumentation = None
+    if args.instrument or args.instrument_output or os.environ.get("TYPING_TEST_INSTRUMENT", "") not in ("", "0"):
+        import instrumentation as instrumentation_module
+        instrumentation = instrumentation_module.enable(
+            args.instrument_output, modules={"typing_test_app": sys.modules[__name__]})
+    
     root = tk.Tk()
-    app = TypingTestApp(root)
+    app = TypingTestApp(root, corpus_path=corpus_path)
+    if instrumentation is not None:
+        instrumentation_module.DebugOverlay(root, instrumentation)
     root.mainloop()
 
 
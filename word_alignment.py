@@ -0,0 +1,350 @@
+"""
+Word Alignment Module
+Word-level scoring that tolerates skipped and inserted characters.
+
+Typed words are aligned to sample words with an edit distance over words:
+a typed word may match a sample word (costing its character edits), be an
+extra word, or the typist may skip sample words. The alignment is a
+dynamic program with one row per typed word, restricted to a band of
+sample words around the previous row's best cell, and per-word character
+distances are restricted to a diagonal band. An edit recomputes only the
+rows from the edited word onward, so typing at the end costs one row.
+One dropped character therefore costs one error instead of misaligning
+every following character.
+"""
+
+import re
+from array import array
+from bisect import bisect_left
+
+
+# Sample words the alignment may move away from its previous best match, per typed word
+WORD_BAND = 2
+
+# Largest per-word edit distance computed exactly; beyond it a word counts as all wrong
+CHAR_BAND = 3
+
+WORD_PATTERN = re.compile(r"\S+")
+
+# Cost of alignment cells that cannot be reached
+UNREACHABLE = 0xFFFFFFFF
+
+
+def banded_edit_distance(typed, expected, band=CHAR_BAND):
+    """
+    Levenshtein distance between two words, limited to a diagonal band
+
+    Args:
+        typed: Typed word
+        expected: Sample word
+        band: Largest distance computed exactly
+
+    Returns:
+        int: Edit distance, or max(len(typed), len(expected)) if it exceeds band
+    """
+    if typed == expected:
+        return 0
+    worst = max(len(typed), len(expected))
+    if abs(len(typed) - len(expected)) > band:
+        return worst
+
+    outside = worst + 1
+    previous = [column if column <= band else outside for column in range(len(expected) + 1)]
+    for row in range(1, len(typed) + 1):
+        low = max(1, row - band)
+        high = min(len(expected), row + band)
+        current = [outside] * (len(expected) + 1)
+        if row <= band:
+            current[0] = row
+        char = typed[row - 1]
+        for column in range(low, high + 1):
+            cost = previous[column - 1] + (char != expected[column - 1])
+            if previous[column] + 1 < cost:
+                cost = previous[column] + 1
+            if current[column - 1] + 1 < cost:
+                cost = current[column - 1] + 1
+            current[column] = cost
+        previous = current
+
+    distance = previous[len(expected)]
+    return distance if distance <= band else worst
+
+
+class WordAligner:
+    """Incremental word-level alignment of typed input against a sample text"""
+
+    __slots__ = ("sample_words", "sample_open", "typed", "starts", "ends",
+                 "row_starts", "char_costs", "word_costs")
+
+    # Cells per alignment row: sample words from WORD_BAND before to
+    # WORD_BAND + 1 after the previous row's best cell
+    ROW_WIDTH = 2 * WORD_BAND + 2
+
+    def __init__(self, sample_text=""):
+        self.reset(sample_text)
+
+    def reset(self, sample_text=""):
+        """Start aligning against a new sample text"""
+        self.sample_words = WORD_PATTERN.findall(sample_text)
+        self.sample_open = bool(sample_text) and not sample_text[-1].isspace()
+        self.typed = ""
+        # Per typed word: character span, and its alignment row. Cell k of
+        # row i is the cheapest alignment of typed words 0..i with the first
+        # row_starts[i] + k sample words, as (character errors, word errors);
+        # cells outside the sample hold UNREACHABLE.
+        self.starts = array('I')
+        self.ends = array('I')
+        self.row_starts = array('I')
+        self.char_costs = array('I')
+        self.word_costs = array('I')
+
+    def _best_cell(self, row):
+        """Get (sample words consumed, character errors, word errors) at a row's cheapest cell"""
+        base = row * self.ROW_WIDTH
+        best = None
+        for offset in range(self.ROW_WIDTH):
+            cost = (self.char_costs[base + offset], self.word_costs[base + offset])
+            if best is None or cost < best[1:]:
+                best = (self.row_starts[row] + offset,) + cost
+        return best
+
+    @property
+    def incorrect_chars(self):
+        """Character errors: edits within words, extra words and skipped words"""
+        return self._best_cell(len(self.row_starts) - 1)[1] if self.row_starts else 0
+
+    @property
+    def incorrect_words(self):
+        """Mistyped, skipped and extra words"""
+        return self._best_cell(len(self.row_starts) - 1)[2] if self.row_starts else 0
+
+    def is_complete(self):
+        """Whether the typed words reach the end of the sample, ending with its last word"""
+        if not self.row_starts or not self.sample_words:
+            return False
+        count = self._best_cell(len(self.row_starts) - 1)[0]
+        last_word = self.typed[self.starts[-1]:self.ends[-1]]
+        return count == len(self.sample_words) and last_word == self.sample_words[-1]
+
+    def last_word_correct(self):
+        """Whether the last typed word matches its sample word on the cheapest alignment"""
+        if not self.row_starts:
+            return False
+        row = len(self.row_starts) - 1
+        count, chars, words = self._best_cell(row)
+        if count == 0:
+            return False
+        previous_start, previous_chars, previous_words = self._previous_row(row)
+        previous = count - 1 - previous_start
+        if not 0 <= previous < self.ROW_WIDTH:
+            return False
+        word = self.typed[self.starts[row]:self.ends[row]]
+        sample_word = self.sample_words[count - 1]
+        if not self.typed[-1].isspace():
+            # A word still being typed only has to match the start of its sample word
+            sample_word = sample_word[:len(word)]
+        # Matched without errors: the cell's cost is the previous cell's, unchanged
+        return word == sample_word and (previous_chars[previous], previous_words[previous]) == (chars, words)
+
+    def update(self, typed, position=0):
+        """
+        Realign after the typed input changed
+
+        Args:
+            typed: New typed input
+            position: Index of the first character that may have changed
+        """
+        self.typed = typed
+        # Words ending before the edit are unaffected; a word ending at it may grow
+        first = bisect_left(self.ends, position)
+        start = min(self.starts[first], position) if first < len(self.starts) else position
+        self._truncate(first)
+        self._align_from(start)
+
+    def extend_sample(self, text):
+        """Append text to the sample and realign the rows that reached its old end"""
+        if not text:
+            return
+        old_count = len(self.sample_words)
+        words = WORD_PATTERN.findall(text)
+        if self.sample_open and words and not text[0].isspace():
+            # The text continues the last sample word
+            self.sample_words[-1] += words.pop(0)
+        self.sample_words.extend(words)
+        self.sample_open = not text[-1].isspace()
+
+        # Rows whose band was cut off by the old end (or used the last word) are recomputed
+        first = len(self.row_starts)
+        for row in range(len(self.row_starts) - 1, -1, -1):
+            if self.row_starts[row] + self.ROW_WIDTH - 1 >= old_count:
+                first = row
+        start = self.starts[first] if first < len(self.starts) else len(self.typed)
+        self._truncate(first)
+        self._align_from(start)
+
+    def _truncate(self, count):
+        """Forget the alignment of typed words from index count onward"""
+        for column in (self.starts, self.ends, self.row_starts):
+            del column[count:]
+        del self.char_costs[count * self.ROW_WIDTH:]
+        del self.word_costs[count * self.ROW_WIDTH:]
+
+    def _previous_row(self, row):
+        """
+        Get the row before a typed word
+
+        Returns:
+            tuple: (first sample word count, character costs, word costs);
+                before the first typed word this is the cost of skipping words
+        """
+        if row > 0:
+            base = (row - 1) * self.ROW_WIDTH
+            return (self.row_starts[row - 1],
+                    self.char_costs[base:base + self.ROW_WIDTH],
+                    self.word_costs[base:base + self.ROW_WIDTH])
+        char_costs, word_costs = [0], [0]
+        for count in range(1, self.ROW_WIDTH):
+            if count <= len(self.sample_words):
+                char_costs.append(char_costs[-1] + len(self.sample_words[count - 1]))
+                word_costs.append(count)
+            else:
+                char_costs.append(UNREACHABLE)
+                word_costs.append(UNREACHABLE)
+        return 0, char_costs, word_costs
+
+    def _align_from(self, start):
+        """Align the typed words starting at or after character index start"""
+        typed = self.typed
+        in_progress = typed and not typed[-1].isspace()
+        for match in WORD_PATTERN.finditer(typed, start):
+            word = match.group()
+            self._add_row(word, in_progress and match.end() == len(typed))
+            self.starts.append(match.start())
+            self.ends.append(match.end())
+
+    def _add_row(self, word, in_progress):
+        """Compute the alignment row for the next typed word"""
+        row = len(self.row_starts)
+        previous_start, previous_chars, previous_words = self._previous_row(row)
+        sample_count = len(self.sample_words)
+
+        # Center the band on the previous row's cheapest cell
+        center = previous_start
+        best = (UNREACHABLE, UNREACHABLE)
+        for offset in range(self.ROW_WIDTH):
+            cost = (previous_chars[offset], previous_words[offset])
+            if cost < best:
+                best = cost
+                center = previous_start + offset
+        row_start = max(0, center - WORD_BAND)
+
+        chars = []
+        words = []
+        for offset in range(self.ROW_WIDTH):
+            count = row_start + offset  # Sample words consumed
+            if count > sample_count:
+                chars.append(UNREACHABLE)
+                words.append(UNREACHABLE)
+                continue
+            best = (UNREACHABLE, UNREACHABLE)
+
+            # Extra word: the previous row already consumed count sample words
+            previous = count - previous_start
+            if 0 <= previous < self.ROW_WIDTH and previous_chars[previous] != UNREACHABLE:
+                best = (previous_chars[previous] + len(word), previous_words[previous] + 1)
+
+            # Match: the word is aligned with sample word count - 1
+            previous = count - 1 - previous_start
+            if count > 0 and 0 <= previous < self.ROW_WIDTH and previous_chars[previous] != UNREACHABLE:
+                sample_word = self.sample_words[count - 1]
+                if in_progress:
+                    # A word still being typed is compared with the same length of its match
+                    sample_word = sample_word[:len(word)]
+                errors = banded_edit_distance(word, sample_word)
+                cost = (previous_chars[previous] + errors, previous_words[previous] + (errors > 0))
+                if cost < best:
+                    best = cost
+
+            # Skip: sample word count - 1 was not typed
+            if offset > 0 and chars[-1] != UNREACHABLE:
+                cost = (chars[-1] + len(self.sample_words[count - 1]), words[-1] + 1)
+                if cost < best:
+                    best = cost
+
+            chars.append(best[0])
+            words.append(best[1])
+
+        self.row_starts.append(row_start)
+        self.char_costs.extend(chars)
+        self.word_costs.extend(words)
+
+    def word_details(self):
+        """
+        Per-word errors, in sample order
+
+        Returns:
+            list: (sample word or None, typed word or None, character errors)
+                tuples for every mistyped, skipped or extra word
+        """
+        if not self.row_starts:
+            return []
+        in_progress = self.typed and not self.typed[-1].isspace()
+        details = []
+        row = len(self.row_starts) - 1
+        count = self._best_cell(row)[0]
+
+        # Trace the cheapest path back through the rows
+        while row >= 0:
+            word = self.typed[self.starts[row]:self.ends[row]]
+            cost = self._cell(row, count)
+            previous_start, previous_chars, previous_words = self._previous_row(row)
+
+            previous = count - 1 - previous_start
+            if count > 0 and 0 <= previous < self.ROW_WIDTH:
+                sample_word = self.sample_words[count - 1]
+                compared = sample_word
+                if in_progress and row == len(self.row_starts) - 1:
+                    compared = sample_word[:len(word)]
+                errors = banded_edit_distance(word, compared)
+                if (previous_chars[previous] + errors, previous_words[previous] + (errors > 0)) == cost:
+                    if errors:
+                        details.append((sample_word, word, errors))
+                    row -= 1
+                    count -= 1
+                    continue
+
+            previous = count - previous_start
+            if (0 <= previous < self.ROW_WIDTH and
+                    (previous_chars[previous] + len(word), previous_words[previous] + 1) == cost):
+                details.append((None, word, len(word)))
+                row -= 1
+                continue
+
+            # Skipped sample word
+            sample_word = self.sample_words[count - 1]
+            details.append((sample_word, None, len(sample_word)))
+            count -= 1
+
+        # Sample words skipped before the first typed word
+        for index in range(count - 1, -1, -1):
+            details.append((self.sample_words[index], None, len(self.sample_words[index])))
+        details.reverse()
+        return details
+
+    def _cell(self, row, count):
+        """Get (character errors, word errors) for a row and a sample word count"""
+        index = row * self.ROW_WIDTH + count - self.row_starts[row]
+        return self.char_costs[index], self.word_costs[index]
+
+
+def positional_word_errors(typed, sample_text):
+    """Count typed words that differ from the sample at the same character positions"""
+    return sum(1 for match in WORD_PATTERN.finditer(typed)
+               if match.group() != sample_text[match.start():match.end()])
+
+
+def align_words(typed, sample_text):
+    """Align a complete typed text against a sample text"""
+    aligner = WordAligner(sample_text)
+    aligner.update(typed, 0)
+    return aligner